@@ -0,0 +1,274 @@
+"""
+Analyzes positions in bulk: the score and principal variation of every legal column of each
+position, found by the minimax search of MiniMaxComputer. Positions are read one per line,
+either as a nested-list board in JSON or as a move string:
+
+    [[0,0,0,0,0,0,0], ..., [0,0,0,1,2,0,0]]
+    4453
+    10x12:5,6,5,11
+
+A move string lists the columns played from the empty board, counted from 1. Boards wider than
+nine columns separate the columns with commas, and boards other than 6x7 start with their size.
+Results are written as JSON lines, in the order of the positions:
+
+    python analysis.py games.txt --depth 6 --workers 8 --each-move --output analysis.jsonl
+"""
+import argparse, json, math, os, sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from bitboard import Bitboard
+from checkers import check_board
+from players import MiniMaxComputer
+from server import MAX_SIZE
+
+
+def parse_moves(text):
+    """
+    Parses a move string.
+
+    Args:
+    - text (str): The move string, as described in the module docstring.
+
+    Returns:
+    - tuple: The number of rows, the number of columns and the columns played, counted from 0.
+
+    Raises:
+    - ValueError: If the string is not a valid move string.
+    """
+    num_rows, num_cols = 6, 7
+    if ":" in text:
+        size, text = text.split(":", 1)
+        num_rows, num_cols = (int(value) for value in size.lower().split("x"))
+        check_size(num_rows, num_cols)
+    text = text.strip()
+    if "," in text or num_cols > 9:
+        moves = [int(value) - 1 for value in text.split(",") if value.strip()]
+    else:
+        moves = [int(value) - 1 for value in text]
+    return num_rows, num_cols, moves
+
+
+def check_size(num_rows, num_cols):
+    """
+    Checks that a board size is one the game can be set up with. Every column of a position is
+    searched, and the results are written in order, so one huge board would hold up the whole stream.
+
+    Raises:
+    - ValueError: If the board has fewer than 4 or more than MAX_SIZE rows or columns.
+    """
+    if not 4 <= num_rows <= MAX_SIZE or not 4 <= num_cols <= MAX_SIZE:
+        raise ValueError(f"board must have 4 to {MAX_SIZE} rows and columns")
+
+
+def play_moves(num_rows, num_cols, moves):
+    """
+    Plays moves from the empty board.
+
+    Returns:
+    - Bitboard: The position reached.
+
+    Raises:
+    - ValueError: If a move is not legal, or is played after the game is won.
+    """
+    position = Bitboard(num_rows, num_cols)
+    for col in moves:
+        if not 0 <= col < num_cols or not position.can_play(col) or position.last_move_won():
+            raise ValueError(f"illegal move {col + 1} after {position.ply} moves")
+        position.play(col)
+    return position
+
+
+def parse_position(line):
+    """
+    Parses a position in either format.
+
+    Args:
+    - line (str): A nested-list board in JSON or a move string.
+
+    Returns:
+    - list: The board state as a 2D list of integers.
+
+    Raises:
+    - ValueError: If the line is not a valid position, or a board that cannot be reached in a game.
+    """
+    line = line.strip()
+    if line.startswith("["):
+        board = json.loads(line)
+        # the side to move is inferred from the pieces, so only boards reachable in a game are analyzed
+        check_board(board)
+        check_size(len(board), len(board[0]))
+        return board
+    return play_moves(*parse_moves(line)).to_board()
+
+
+def read_positions(lines, each_move=False):
+    """
+    Turns lines of positions into boards, lazily, leaving out blank lines and lines starting with #.
+
+    Args:
+    - lines (iterable): The lines to read, such as an open file.
+    - each_move (bool): Whether a move string stands for every position of its game, from the
+      empty board to the last move, instead of the last position only. Default is False.
+
+    Returns:
+    - generator: The line number, the number of moves played (None for a nested-list board) and
+      the board or the error message of each position.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            if each_move and not line.startswith("["):
+                num_rows, num_cols, moves = parse_moves(line)
+                play_moves(num_rows, num_cols, moves)
+                for ply in range(len(moves) + 1):
+                    yield number, ply, play_moves(num_rows, num_cols, moves[:ply]).to_board()
+            else:
+                yield number, None, parse_position(line)
+        except ValueError as error:
+            yield number, None, str(error)
+
+
+# the players of an analysis process, one per side to move and board size, keeping their
+# transposition tables between positions
+analyzers = {}
+
+
+def analyze(board, depth):
+    """
+    Finds the score and principal variation of every legal column of a position, for the
+    player to move. Every column is searched with the full window, so each score is exact
+    rather than a bound. The variations follow the best moves the search left in the
+    transposition table. The table is kept between calls, so consecutive positions of a game
+    are analyzed faster, and a score may come from a deeper search of an earlier position.
+
+    Args:
+    - board (list): The board state as a 2D list of integers.
+    - depth (int): The depth of the search below each column.
+
+    Returns:
+    - dict: The player to move, the best column, and the score and principal variation of each legal
+      column by column, or an error if the game is over.
+    """
+    position = Bitboard.from_board(board)
+    if position.is_win(1) or position.is_win(2) or position.is_full():
+        return {"error": "game over"}
+    key = (position.num_rows, position.num_cols, position.turn)
+    if key not in analyzers:
+        # the solver and the book answer for the best move only, so neither is used
+        analyzers[key] = MiniMaxComputer(position.turn, None, depth, solver_threshold=0, radius=None)
+    player = analyzers[key]
+    player.prepare(board)
+    scores = {}
+    variations = {}
+    for col in player.position.legal_moves():
+        scores[col], variations[col] = principal_variation(player, col, depth)
+    best = max(scores, key=lambda col: scores[col])
+    return {"to_move": position.turn, "best": best, "scores": scores, "pv": variations}
+
+
+def principal_variation(player, col, depth):
+    """
+    Searches a column of the search position of a player and reads its principal variation from the transposition table.
+
+    Args:
+    - player (MiniMaxComputer): The player, prepared with the position to analyze.
+    - col (int): The column to search.
+    - depth (int): The depth of the search below the column.
+
+    Returns:
+    - tuple: The score of the column and the columns of its principal variation, starting with it.
+    """
+    position = player.position
+    tt = player.tt
+    player.apply(col)
+    score = player.minimax(depth, -math.inf, math.inf, False)
+    line = [col]
+    while len(line) <= depth and not position.last_move_won() and not position.is_full():
+        key, mirrored = player.tt_key()
+        slot = tt.probe(key, mirrored)
+        if slot < 0:
+            break
+        move = position.mirror_move(tt.moves[slot]) if mirrored else tt.moves[slot]
+        if move < 0 or not position.can_play(move):
+            break
+        player.apply(move)
+        line.append(move)
+    for _ in line:
+        player.undo()
+    return score, line
+
+
+def analyze_entry(entry):
+    """
+    Analyzes one position read by read_positions, in a worker process or in this one.
+
+    Args:
+    - entry (tuple): The line number, the number of moves played, the board or an error message, and the search depth.
+
+    Returns:
+    - dict: The line number and number of moves of the position, followed by its analysis or its error.
+    """
+    number, ply, board, depth = entry
+    result = {"line": number}
+    if ply is not None:
+        result["ply"] = ply
+    if isinstance(board, str):
+        result["error"] = board
+    else:
+        result.update(analyze(board, depth))
+    return result
+
+
+def analyze_positions(positions, depth, workers=1, chunksize=32):
+    """
+    Analyzes a stream of positions, lazily and in order.
+
+    Positions are handed to the worker processes in chunks of consecutive positions, so the
+    positions of a game mostly go to the same process and reuse its transposition table. Only
+    a bounded number of chunks is read ahead, so the input can be larger than memory.
+
+    Args:
+    - positions (iterable): The positions, as given by read_positions.
+    - depth (int): The depth of the search below each column.
+    - workers (int): The number of processes. With 1, positions are analyzed in this process. Default is 1.
+    - chunksize (int): The number of consecutive positions given to a worker at a time. Default is 32.
+
+    Returns:
+    - generator: The result of analyze_entry for each position.
+    """
+    entries = ((number, ply, board, depth) for number, ply, board in positions)
+    if workers == 1:
+        yield from map(analyze_entry, entries)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        # pool.map would submit the whole input at once, so it is fed one batch at a time
+        while batch := list(islice(entries, 4 * workers * chunksize)):
+            yield from pool.map(analyze_entry, batch, chunksize=chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scores every legal column of a file of positions and writes the results as JSON lines.")
+    parser.add_argument("input", nargs="?", default="-", help="file of positions, one per line, or - for standard input")
+    parser.add_argument("--depth", type=int, default=5, help="search depth below each column")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=32, help="consecutive positions given to a worker at a time")
+    parser.add_argument("--each-move", action="store_true", help="analyze every position of the game of each move string")
+    parser.add_argument("--output", default="-", help="JSONL file to write, or - for standard output")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for result in analyze_positions(read_positions(source, args.each_move), args.depth, args.workers, args.chunksize):
+            output.write(json.dumps(result) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
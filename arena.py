@@ -0,0 +1,196 @@
+"""
+Plays batches of games between computer players without a display and streams one
+JSON line per game, for example:
+
+    python arena.py --games 1000 --workers 8 --player1 MiniMaxComputer --player2 RandomComputer --depth 3 --output results.jsonl
+"""
+import argparse, json, os, sys, time
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from checkers import check_win, check_tie
+from players import MCTSComputer, MiniMaxComputer, players_dict
+from book import OpeningBook
+from evaluation import load_weights
+
+
+class HeadlessGame:
+    def __init__(self, num_rows=6, num_cols=7):
+        """
+        Holds a game board with the attributes players read from Connect4, without any Qt objects.
+
+        Args:
+        - num_rows (int): The number of rows in the game board. Default is 6.
+        - num_cols (int): The number of columns in the game board. Default is 7.
+        """
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.board = [[0 for _ in range(self.num_cols)] for _ in range(self.num_rows)]
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Wraps an existing nested-list board, which the game then plays on.
+
+        Args:
+        - board (list): The board state as a 2D list of integers.
+
+        Returns:
+        - HeadlessGame: The game holding the board.
+        """
+        game = cls(len(board), len(board[0]))
+        game.board = board
+        return game
+
+    def drop(self, col, name):
+        """
+        Places a player's piece in a column.
+
+        Args:
+        - col (int): The column in which to place the piece.
+        - name (int): The player's number.
+
+        Returns:
+        - int: The row in which the piece landed, or None if the column is full or does not exist.
+        """
+        if col is None or not 0 <= col < self.num_cols:
+            return None
+        row = self.num_rows - 1
+        while row >= 0 and self.board[row][col] != 0:
+            row -= 1
+        if row < 0:
+            return None
+        self.board[row][col] = name
+        return row
+
+
+def play_game(spec):
+    """
+    Plays one game to the end.
+
+    Args:
+    - spec (dict): The game settings: game, seed, player1, player2, num_rows, num_cols, depth, time_limit, book,
+      the path of an opening book for the computer players or None, instrument, whether to record the
+      statistics of every move of the MiniMaxComputer players, cache, the path of the persistent cache
+      of the MiniMaxComputer players or None, and weights1 and weights2, the paths of the evaluation
+      weights files of the players, as written by tuner.py, or None for the default weights.
+
+    Returns:
+    - dict: The settings followed by the winner (0 for a tie), the columns played, the seconds each move took,
+      the nodes each move searched and the player who forfeited with an illegal move, if any, and with instrument,
+      the statistics of the moves of the MiniMaxComputer players as instrumentation.SearchStats dictionaries.
+    """
+    random.seed(spec["seed"])
+    game = HeadlessGame(spec["num_rows"], spec["num_cols"])
+    players = [players_dict[spec["player1"]](1, "red", spec["depth"], spec["time_limit"]),
+               players_dict[spec["player2"]](2, "green", spec["depth"], spec["time_limit"])]
+    if spec["book"]:
+        book = OpeningBook(spec["book"])
+        for player in players:
+            if isinstance(player, MiniMaxComputer):
+                player.book = book
+    for player in players:
+        if isinstance(player, MiniMaxComputer):
+            player.instrument = spec["instrument"]
+            player.cache_path = spec["cache"]
+            if spec[f"weights{player.name}"]:
+                player.weights = load_weights(spec[f"weights{player.name}"])
+        elif isinstance(player, MCTSComputer):
+            # the random games draw from the player's own generator, which the seed above does not reach
+            player.rng = random.Random(f"{spec['seed']} {player.name}")
+    result = dict(spec, winner=0, moves=[], latencies=[], nodes=[], forfeit=None)
+    if spec["instrument"]:
+        result["stats"] = []
+    current = 0
+    try:
+        while True:
+            player = players[current]
+            start = time.perf_counter()
+            col = player.play(game)
+            result["latencies"].append(round(time.perf_counter() - start, 6))
+            result["nodes"].append(getattr(player, "nodes", 0))
+            if getattr(player, "stats", None) is not None:
+                result["stats"].append(player.stats.to_dict())
+            row = game.drop(col, player.name)
+            if row is None:
+                result["forfeit"] = player.name
+                result["winner"] = players[1 - current].name
+                break
+            result["moves"].append(col)
+            if check_win(game.board, row, col, game.num_rows, game.num_cols):
+                result["winner"] = player.name
+                break
+            if check_tie(game.board, game.num_cols):
+                break
+            current = 1 - current
+    finally:
+        for player in players:
+            player.close()
+    return result
+
+
+def run_games(specs, output, workers=1):
+    """
+    Plays games in a pool of processes and writes each result as a JSON line as soon as it is known,
+    so results are in completion order rather than game order.
+
+    Args:
+    - specs (list): The settings of each game, as taken by play_game.
+    - output (file): The text file to write the results to.
+    - workers (int): The number of processes. With 1, games are played in this process. Default is 1.
+
+    Returns:
+    - dict: The number of wins of each player and of ties.
+    """
+    totals = {"1": 0, "2": 0, "tie": 0}
+
+    def record(result):
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+        totals[str(result["winner"]) if result["winner"] else "tie"] += 1
+
+    if workers == 1:
+        for spec in specs:
+            record(play_game(spec))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            for future in as_completed([pool.submit(play_game, spec) for spec in specs]):
+                record(future.result())
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays games between computer players without a display and writes them as JSON lines.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--player1", choices=[name for name in players_dict if name != "Human"], default="MiniMaxComputer")
+    parser.add_argument("--player2", choices=[name for name in players_dict if name != "Human"], default="RandomComputer")
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--cols", type=int, default=7)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per move; overrides the fixed depth")
+    parser.add_argument("--book", help="opening book file for the MiniMaxComputer players, as built by book.py")
+    parser.add_argument("--weights1", help="evaluation weights file of player 1, as written by tuner.py")
+    parser.add_argument("--weights2", help="evaluation weights file of player 2, as written by tuner.py")
+    parser.add_argument("--cache", help="persistent cache file shared by the MiniMaxComputer players of all games")
+    parser.add_argument("--instrument", action="store_true", help="add the statistics of every MiniMaxComputer move to the results")
+    parser.add_argument("--seed", type=int, default=0, help="game i is played with seed + i")
+    parser.add_argument("--output", default="-", help="JSONL file to write, or - for standard output")
+    args = parser.parse_args()
+
+    specs = [{"game": i, "seed": args.seed + i, "player1": args.player1, "player2": args.player2,
+              "num_rows": args.rows, "num_cols": args.cols, "depth": args.depth, "time_limit": args.time_limit, "book": args.book,
+              "instrument": args.instrument, "cache": args.cache,
+              "weights1": args.weights1, "weights2": args.weights2}
+             for i in range(args.games)]
+    start = time.perf_counter()
+    if args.output == "-":
+        totals = run_games(specs, sys.stdout, args.workers)
+    else:
+        with open(args.output, "w") as output:
+            totals = run_games(specs, output, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{args.games} games in {elapsed:.1f}s: player 1 won {totals['1']}, player 2 won {totals['2']}, {totals['tie']} ties", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures how the parallel root search of MiniMaxComputer scales with the number of
+worker processes. Run from the repository root:
+
+    python -m benchmarks.parallel_scaling --rows 6 --cols 7 --depth 5
+"""
+import argparse, os, random, time
+from arena import HeadlessGame
+from bitboard import Bitboard
+from players import MiniMaxComputer
+
+
+def make_positions(num_rows, num_cols, count, plies, seed):
+    """
+    Plays random moves from the empty board to build a fixed set of positions with player 1 to move.
+
+    Args:
+    - num_rows (int): The number of rows in the game board.
+    - num_cols (int): The number of columns in the game board.
+    - count (int): The number of positions.
+    - plies (int): The number of moves played in each position; rounded down to an even number.
+    - seed (int): The seed of the random moves.
+
+    Returns:
+    - list: The positions, as objects with the board, num_rows and num_cols attributes of Connect4.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        position = Bitboard(num_rows, num_cols)
+        for _ in range(plies - plies % 2):
+            position.play(rng.choice(position.legal_moves()))
+            if position.last_move_won():
+                break
+        else:
+            positions.append(HeadlessGame.from_board(position.to_board()))
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--cols", type=int, default=7)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--positions", type=int, default=8)
+    parser.add_argument("--plies", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    positions = make_positions(args.rows, args.cols, args.positions, args.plies, args.seed)
+    print(f"{args.rows}x{args.cols}, depth {args.depth}, {len(positions)} positions, {os.cpu_count()} CPUs")
+    serial_time = None
+    serial_moves = None
+    for workers in args.workers:
+        player = MiniMaxComputer(1, "red", args.depth, workers=workers)
+        # start the worker processes before timing, with a search too shallow to fill their tables
+        if workers > 1:
+            player.prepare(positions[0].board)
+            player.parallel_search_root(positions[0].board, player.position.legal_moves(), 0)
+        moves = []
+        nodes = 0
+        start = time.perf_counter()
+        for position in positions:
+            moves.append(player.play(position))
+            nodes += player.nodes
+        elapsed = time.perf_counter() - start
+        player.close()
+        if serial_time is None:
+            serial_time, serial_moves = elapsed, moves
+        same = "same moves" if moves == serial_moves else "DIFFERENT MOVES"
+        print(f"{workers:>3} workers: {elapsed:8.2f}s  {nodes / elapsed:10.0f} nodes/s  speedup {serial_time / elapsed:5.2f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
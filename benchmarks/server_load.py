@@ -0,0 +1,120 @@
+"""
+Loads a running move server with many concurrent games and reports its latency and
+throughput. Start the server, then run from the repository root:
+
+    python server.py --workers 4 &
+    python -m benchmarks.server_load --connections 16 --requests 400 --depth 4
+"""
+import argparse, asyncio, json, random, time
+from bitboard import Bitboard
+
+
+def make_requests(num_rows, num_cols, count, distinct, plies, depth, seed):
+    """
+    Builds requests for random positions, drawn from a smaller set of distinct positions so that some repeat.
+
+    Args:
+    - num_rows (int): The number of rows in the game board.
+    - num_cols (int): The number of columns in the game board.
+    - count (int): The number of requests.
+    - distinct (int): The number of distinct positions.
+    - plies (int): The largest number of moves played in a position.
+    - depth (int): The search depth of the requests.
+    - seed (int): The seed of the random moves.
+
+    Returns:
+    - list: The requests, numbered by their id.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < distinct:
+        position = Bitboard(num_rows, num_cols)
+        for _ in range(rng.randint(0, plies)):
+            position.play(rng.choice(position.legal_moves()))
+            if position.last_move_won():
+                break
+        else:
+            positions.append((position.to_board(), position.turn))
+    requests = []
+    for request_id in range(count):
+        board, player = rng.choice(positions)
+        requests.append({"id": request_id, "board": board, "player": player, "depth": depth})
+    return requests
+
+
+async def run_connection(host, port, requests, in_flight, latencies, counts):
+    """
+    Sends requests over one connection, keeping up to in_flight of them unanswered at a time.
+
+    Returns:
+    - None
+    """
+    reader, writer = await asyncio.open_connection(host, port, limit=2 ** 20)
+    sent = {}
+    window = asyncio.Semaphore(in_flight)
+
+    async def send():
+        for request in requests:
+            await window.acquire()
+            sent[request["id"]] = time.perf_counter()
+            writer.write((json.dumps(request) + "\n").encode())
+            await writer.drain()
+
+    sender = asyncio.create_task(send())
+    for _ in requests:
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - sent.pop(response["id"]))
+        if response.get("error") == "busy":
+            counts["busy"] += 1
+        elif "error" in response:
+            counts["errors"] += 1
+        elif response["cached"]:
+            counts["cached"] += 1
+        window.release()
+    await sender
+    writer.close()
+    await writer.wait_closed()
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which the given fraction of the sorted values lie.
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run(args):
+    requests = make_requests(args.rows, args.cols, args.requests, args.distinct, args.plies, args.depth, args.seed)
+    latencies = []
+    counts = {"busy": 0, "errors": 0, "cached": 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_connection(args.host, args.port, requests[index::args.connections], args.in_flight, latencies, counts)
+        for index in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{len(requests)} requests over {args.connections} connections in {elapsed:.2f}s: {len(requests) / elapsed:.1f} requests/s")
+    print(f"latency p50 {percentile(latencies, 0.5) * 1000:.1f}ms  p99 {percentile(latencies, 0.99) * 1000:.1f}ms  max {latencies[-1] * 1000:.1f}ms")
+    print(f"{counts['cached']} cached, {counts['busy']} busy, {counts['errors']} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--cols", type=int, default=7)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--distinct", type=int, default=200, help="number of distinct positions the requests are drawn from")
+    parser.add_argument("--plies", type=int, default=12, help="largest number of moves played in a position")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--in-flight", type=int, default=4, help="unanswered requests allowed on each connection")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
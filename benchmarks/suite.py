@@ -0,0 +1,264 @@
+"""
+Benchmarks the hot paths of the engine on a fixed corpus of positions: check_win,
+check_tie, the evaluation and the minimax search. Run from the repository root:
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --baseline baseline.json
+
+With --baseline, the run fails with exit status 1 if any throughput drops, or any
+memory figure grows, by more than the tolerance.
+"""
+import argparse, gc, json, random, sys, time, tracemalloc
+from arena import HeadlessGame
+from checkers import check_win, check_tie, immediate_wins, forced_blocks
+from bitboard import Bitboard
+from evaluation import Evaluator
+from players import MiniMaxComputer
+
+# board sizes and the search depths measured on each
+DEPTHS = {(6, 7): (2, 4), (10, 10): (2, 3), (20, 20): (1, 2), (50, 50): (1,)}
+# share of the board filled in the corpus positions
+FILLS = (0.2, 0.4)
+POSITIONS_PER_FILL = 3
+CORPUS_SEED = 20240
+
+
+def make_corpus(num_rows, num_cols):
+    """
+    Builds the positions of a board size by playing seeded random moves. The positions are
+    the same on every run, have player 1 to move and are quiet: no move wins at once for
+    either player, so the tactical pre-pass of the search cannot answer them without searching.
+
+    Returns:
+    - list: The positions as Bitboard objects.
+    """
+    rng = random.Random(f"{CORPUS_SEED} {num_rows}x{num_cols}")
+    corpus = []
+    for fill in FILLS:
+        plies = int(fill * num_rows * num_cols) // 2 * 2
+        count = 0
+        while count < POSITIONS_PER_FILL:
+            position = Bitboard(num_rows, num_cols)
+            while position.ply < plies:
+                # random moves after which neither player can win at once
+                moves = position.legal_moves()
+                rng.shuffle(moves)
+                for col in moves:
+                    position.play(col)
+                    if not position.last_move_won() and not immediate_wins(position) and not forced_blocks(position):
+                        break
+                    position.undo()
+                else:
+                    break
+            if position.ply == plies:
+                corpus.append(position)
+                count += 1
+    return corpus
+
+
+def time_calls(function, calls_per_run, min_time=0.2, repeats=3):
+    """
+    Times a function that makes a known number of calls, repeating it until min_time has passed, and keeps the best of several repeats.
+
+    Returns:
+    - float: The calls per second.
+    """
+    best = 0.0
+    for _ in range(repeats):
+        runs = 0
+        start = time.perf_counter()
+        while True:
+            function()
+            runs += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, runs * calls_per_run / elapsed)
+    return best
+
+
+def bench_check_win(corpus):
+    cases = []
+    for position in corpus:
+        board = position.to_board()
+        for col in range(position.num_cols):
+            if position.heights[col]:
+                cases.append((board, position.num_rows - position.heights[col], col))
+    num_rows, num_cols = corpus[0].num_rows, corpus[0].num_cols
+
+    def run():
+        for board, row, col in cases:
+            check_win(board, row, col, num_rows, num_cols)
+    return {"ops_per_sec": time_calls(run, len(cases))}
+
+
+def bench_check_tie(corpus):
+    boards = [position.to_board() for position in corpus]
+    num_cols = corpus[0].num_cols
+
+    def run():
+        for board in boards:
+            check_tie(board, num_cols)
+    return {"ops_per_sec": time_calls(run, len(boards))}
+
+
+def bench_evaluate(corpus):
+    evaluator = Evaluator(corpus[0].num_rows, corpus[0].num_cols)
+
+    def run():
+        for position in corpus:
+            evaluator.evaluate(position, 1)
+    return {"ops_per_sec": time_calls(run, len(corpus))}
+
+
+def bench_minimax(corpus, depth, min_time=0.2, repeats=3):
+    """
+    Searches every corpus position with a fresh player. Speed is measured first, like
+    time_calls: passes over the corpus are repeated until min_time has passed, with new
+    players each pass so that no pass reuses the table of another, and the best of several
+    repeats is kept. Peak traced memory and retained blocks are measured in a second,
+    traced pass, since tracing slows the search down. Both are taken once the player is
+    built, so the fixed allocation of its transposition table is left out, and before it
+    is torn down. Retained blocks are net of frees: the memory a search keeps per node.
+    Allocations are counted in a third pass, with count_allocations.
+    """
+    boards = [HeadlessGame.from_board(position.to_board()) for position in corpus]
+    best = 0.0
+    for _ in range(repeats):
+        nodes = runs = 0
+        elapsed = 0.0
+        while elapsed < min_time:
+            players = [MiniMaxComputer(1, "red", depth) for _ in boards]
+            start = time.perf_counter()
+            for board, player in zip(boards, players):
+                player.play(board)
+            elapsed += time.perf_counter() - start
+            nodes += sum(player.nodes for player in players)
+            runs += 1
+        best = max(best, nodes / elapsed)
+    # the search is deterministic, so the counts of the last pass are those of every pass
+    nodes = nodes // runs
+    cutoffs = sum(player.cutoffs for player in players)
+    first_move_cutoffs = sum(player.first_move_cutoffs for player in players)
+    branching_factor = sum(player.branching_factor for player in players) / len(players)
+    del players
+
+    peak = blocks = 0
+    tracemalloc.start()
+    for board in boards:
+        player = MiniMaxComputer(1, "red", depth, tt_size_mb=1)
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        before = tracemalloc.take_snapshot()
+        player.play(board)
+        _, board_peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        peak = max(peak, board_peak - base)
+        # the snapshots themselves are left out of the count
+        own = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        blocks += sum(stat.count_diff for stat in after.filter_traces(own).compare_to(before.filter_traces(own), "filename"))
+        del player, before, after
+    tracemalloc.stop()
+
+    allocations = 0
+    for board in boards:
+        player = MiniMaxComputer(1, "red", depth, tt_size_mb=1)
+        allocations += count_allocations(lambda: player.play(board))
+        del player
+    return {"nodes_per_sec": best, "nodes": nodes, "branching_factor": branching_factor,
+            "first_move_cutoff_rate": first_move_cutoffs / cutoffs if cutoffs else 0.0, "peak_kb": peak / 1024,
+            "retained_blocks_per_node": max(0, blocks) / nodes, "allocations_per_node": allocations / nodes}
+
+
+def count_allocations(function):
+    """
+    Counts the objects a call allocates, freed or not. Python keeps no such count, but the
+    garbage collector counts the objects it tracks (lists, dicts, sets, instances and so on)
+    as they are allocated, and with a threshold of one it collects on every second such
+    allocation. Objects freed before the next allocation and objects it does not track,
+    such as ints, can be missed, so the count is a lower bound that grows with the real one.
+
+    Returns:
+    - int: The allocations made by the call.
+    """
+    thresholds = gc.get_threshold()
+    gc.collect()
+    # older generations are never collected during the call, as only their count would change
+    gc.set_threshold(1, 1 << 30, 1 << 30)
+    try:
+        collections = gc.get_stats()[0]["collections"]
+        function()
+        return 2 * (gc.get_stats()[0]["collections"] - collections)
+    finally:
+        gc.set_threshold(*thresholds)
+
+
+# whether a larger value of a metric is better; metrics not listed are informational
+HIGHER_IS_BETTER = {"ops_per_sec": True, "nodes_per_sec": True, "peak_kb": False, "retained_blocks_per_node": False, "allocations_per_node": False}
+# growth allowed on top of the tolerance for metrics whose baseline can be close to zero
+ABSOLUTE_SLACK = {"peak_kb": 64, "retained_blocks_per_node": 0.05, "allocations_per_node": 0.5}
+
+
+def run_suite(sizes):
+    results = {}
+    for num_rows, num_cols in sizes:
+        corpus = make_corpus(num_rows, num_cols)
+        size = f"{num_rows}x{num_cols}"
+        results[f"check_win/{size}"] = bench_check_win(corpus)
+        results[f"check_tie/{size}"] = bench_check_tie(corpus)
+        results[f"evaluate/{size}"] = bench_evaluate(corpus)
+        for depth in DEPTHS[(num_rows, num_cols)]:
+            results[f"minimax/{size}/depth{depth}"] = bench_minimax(corpus, depth)
+        for name in results:
+            if name.split("/")[1] == size:
+                print(f"{name:28} " + "  ".join(f"{metric} {value:,.2f}" for metric, value in results[name].items()), flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares a run with a saved baseline.
+
+    Returns:
+    - list: A message for each metric that got worse by more than the tolerance.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            if metric not in HIGHER_IS_BETTER or metric not in baseline.get(name, {}):
+                continue
+            reference = baseline[name][metric]
+            if HIGHER_IS_BETTER[metric]:
+                worse = value < reference * (1 - tolerance)
+            else:
+                worse = value > reference * (1 + tolerance) + ABSOLUTE_SLACK.get(metric, 0)
+            if worse:
+                regressions.append(f"{name} {metric}: {value:,.2f} against {reference:,.2f} in the baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks check_win, check_tie, the evaluation and the search.")
+    parser.add_argument("--sizes", nargs="+", default=[f"{rows}x{cols}" for rows, cols in DEPTHS], help="board sizes to run, among " + ", ".join(f"{rows}x{cols}" for rows, cols in DEPTHS))
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare the results with this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative change allowed before a metric counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [tuple(int(n) for n in size.split("x")) for size in args.sizes]
+    results = run_suite(sizes)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("no regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import random
+
+
+_zobrist_tables = {}
+
+
+def zobrist_keys(num_rows, num_cols):
+    """
+    Returns the Zobrist keys for a board size, creating them on first use.
+
+    The keys are drawn from a generator seeded with the board size, so every process
+    hashes the same position to the same value.
+
+    Args:
+    - num_rows (int): The number of rows in the game board.
+    - num_cols (int): The number of columns in the game board.
+
+    Returns:
+    - tuple: One list of 64-bit keys per player, indexed by bit, and the key xored in when player 2 is to move.
+    """
+    if (num_rows, num_cols) not in _zobrist_tables:
+        rng = random.Random(f"zobrist {num_rows}x{num_cols}")
+        num_bits = num_cols * (num_rows + 3)
+        keys = ([rng.getrandbits(64) for _ in range(num_bits)], [rng.getrandbits(64) for _ in range(num_bits)])
+        _zobrist_tables[(num_rows, num_cols)] = (keys, rng.getrandbits(64))
+    return _zobrist_tables[(num_rows, num_cols)]
+
+
+class Bitboard:
+    def __init__(self, num_rows=6, num_cols=7):
+        """
+        Creates an empty position stored as one integer mask per player.
+
+        Cell (row, col) of the nested-list board, with row 0 at the top, lives at
+        bit col * stride + (num_rows - 1 - row) of the masks, so every column is a
+        contiguous run of bits that fills from its lowest bit upwards. Each column
+        is followed by three guard bits that are never set; they keep shifted masks
+        from carrying a piece into the neighbouring column, and let any window of
+        four cells that reaches off the board read as empty.
+
+        Args:
+        - num_rows (int): The number of rows in the game board. Default is 6.
+        - num_cols (int): The number of columns in the game board. Default is 7.
+        """
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.stride = num_rows + 3
+        self.masks = [0, 0]
+        self.heights = [0] * num_cols
+        self.moves = []
+        self.ply = 0
+        self.turn = 1
+        self.zobrist, self.zobrist_turn = zobrist_keys(num_rows, num_cols)
+        self.hash = 0
+        # hash of the position reflected left to right, kept up to date alongside hash
+        self.mirror_hash = 0
+        column_mask = (1 << num_rows) - 1
+        self.board_mask = 0
+        self.bottom_mask = 0
+        for col in range(num_cols):
+            self.board_mask |= column_mask << (col * self.stride)
+            self.bottom_mask |= 1 << (col * self.stride)
+        # vertical, anti-diagonal, horizontal and diagonal neighbours
+        self.shifts = (1, self.stride - 1, self.stride, self.stride + 1)
+
+    @classmethod
+    def from_board(cls, board, turn=None):
+        """
+        Builds a bitboard from a nested-list board as used by Connect4.board.
+        The hash of the result matches the one reached by playing the same pieces.
+
+        Args:
+        - board (list): The board state as a 2D list of integers (0 empty, 1 or 2 for a player's piece).
+        - turn (int): The player to move. If None, it is inferred from the piece counts, assuming player 1 moved first.
+
+        Returns:
+        - Bitboard: The equivalent position.
+        """
+        position = cls(len(board), len(board[0]))
+        counts = [0, 0]
+        for row in range(position.num_rows):
+            for col in range(position.num_cols):
+                player = board[row][col]
+                if player:
+                    bit = position.bit(row, col)
+                    position.masks[player - 1] |= 1 << bit
+                    position.hash ^= position.zobrist[player - 1][bit]
+                    position.mirror_hash ^= position.zobrist[player - 1][position.bit(row, position.num_cols - 1 - col)]
+                    position.heights[col] += 1
+                    counts[player - 1] += 1
+        position.ply = counts[0] + counts[1]
+        if turn is None:
+            turn = 1 if counts[0] <= counts[1] else 2
+        position.turn = turn
+        if turn == 2:
+            position.hash ^= position.zobrist_turn
+            position.mirror_hash ^= position.zobrist_turn
+        return position
+
+    def to_board(self):
+        """
+        Converts the position back into a nested-list board.
+
+        Returns:
+        - list: The board state as a 2D list of integers, with row 0 at the top.
+        """
+        return [[self.cell(row, col) for col in range(self.num_cols)] for row in range(self.num_rows)]
+
+    def canonical(self):
+        """
+        Returns a key shared by the position and its reflection left to right: the smaller
+        of the two hashes. Moves stored under the key are in the columns of the position
+        that has it, so they must be mirrored with mirror_move when the reflection was taken.
+
+        Returns:
+        - tuple: The key and whether it is the hash of the reflection.
+        """
+        if self.mirror_hash < self.hash:
+            return self.mirror_hash, True
+        return self.hash, False
+
+    def mirror_move(self, col):
+        """
+        Returns the column a move is played in on the reflected board. A missing move (-1) is left as it is.
+        """
+        return self.num_cols - 1 - col if col >= 0 else col
+
+    def copy(self):
+        """
+        Returns an independent copy of the position, including its move history.
+        """
+        position = Bitboard.__new__(Bitboard)
+        position.__dict__.update(self.__dict__)
+        position.masks = self.masks[:]
+        position.heights = self.heights[:]
+        position.moves = self.moves[:]
+        return position
+
+    def bit(self, row, col):
+        """
+        Returns the index of the bit that stores the given nested-list cell.
+        """
+        return col * self.stride + self.num_rows - 1 - row
+
+    def cell(self, row, col):
+        """
+        Returns the piece at the given nested-list cell: 0 if empty, otherwise the player number.
+        """
+        bit = 1 << self.bit(row, col)
+        if self.masks[0] & bit:
+            return 1
+        if self.masks[1] & bit:
+            return 2
+        return 0
+
+    def can_play(self, col):
+        """
+        Checks if a piece can still be dropped into the given column.
+        """
+        return self.heights[col] < self.num_rows
+
+    def legal_moves(self):
+        """
+        Returns the list of columns that are not full, from left to right.
+        """
+        return [col for col in range(self.num_cols) if self.heights[col] < self.num_rows]
+
+    def next_row(self, col):
+        """
+        Returns the nested-list row in which a piece dropped into the given column would land.
+        """
+        return self.num_rows - 1 - self.heights[col]
+
+    def play(self, col):
+        """
+        Drops a piece for the player to move into the given column. The column must not be full.
+
+        Args:
+        - col (int): The column in which to place the piece.
+
+        Returns:
+        - int: The nested-list row in which the piece landed.
+        """
+        height = self.heights[col]
+        bit = col * self.stride + height
+        self.masks[self.turn - 1] |= 1 << bit
+        self.hash ^= self.zobrist[self.turn - 1][bit] ^ self.zobrist_turn
+        self.mirror_hash ^= self.zobrist[self.turn - 1][(self.num_cols - 1 - col) * self.stride + height] ^ self.zobrist_turn
+        self.heights[col] = height + 1
+        self.moves.append(col)
+        self.ply += 1
+        self.turn = 3 - self.turn
+        return self.num_rows - 1 - height
+
+    def undo(self):
+        """
+        Takes back the last move made with play.
+
+        Returns:
+        - int: The column of the move that was taken back.
+        """
+        col = self.moves.pop()
+        self.turn = 3 - self.turn
+        self.ply -= 1
+        height = self.heights[col] - 1
+        self.heights[col] = height
+        bit = col * self.stride + height
+        self.masks[self.turn - 1] ^= 1 << bit
+        self.hash ^= self.zobrist[self.turn - 1][bit] ^ self.zobrist_turn
+        self.mirror_hash ^= self.zobrist[self.turn - 1][(self.num_cols - 1 - col) * self.stride + height] ^ self.zobrist_turn
+        return col
+
+    def has_four(self, mask):
+        """
+        Checks if a mask contains four aligned bits, using one shift-and-mask test per direction.
+        """
+        for shift in self.shifts:
+            pairs = mask & (mask >> shift)
+            if pairs & (pairs >> (2 * shift)):
+                return True
+        return False
+
+    def is_win(self, player):
+        """
+        Checks if the given player has four in a row anywhere on the board.
+        """
+        return self.has_four(self.masks[player - 1])
+
+    def last_move_won(self):
+        """
+        Checks if the player who made the last move has won. Only that player's pieces
+        can have formed a new line, so the opponent's mask is never tested.
+        """
+        return self.has_four(self.masks[2 - self.turn])
+
+    def winning_cells(self, player):
+        """
+        Returns the mask of the empty cells that would complete four in a row for a player,
+        whether they can be played yet or not.
+        """
+        own = self.masks[player - 1]
+        # vertical lines can only be completed from above
+        cells = (own << 1) & (own << 2) & (own << 3)
+        for shift in self.shifts[1:]:
+            pairs = (own << shift) & (own << 2 * shift)
+            cells |= pairs & (own << 3 * shift)
+            cells |= pairs & (own >> shift)
+            pairs = (own >> shift) & (own >> 2 * shift)
+            cells |= pairs & (own << shift)
+            cells |= pairs & (own >> 3 * shift)
+        return cells & self.board_mask & ~(self.masks[0] | self.masks[1])
+
+    def playable(self):
+        """
+        Returns the mask of the cells a piece can be dropped into: the lowest empty cell of every column that is not full.
+        """
+        return ((self.masks[0] | self.masks[1]) + self.bottom_mask) & self.board_mask
+
+    def column_mask(self, col):
+        """
+        Returns the mask of the cells of a column.
+        """
+        return ((1 << self.num_rows) - 1) << (col * self.stride)
+
+    def non_losing_moves(self):
+        """
+        Returns the mask of the playable cells after which the opponent cannot win at once.
+        It is empty if the opponent has two winning cells to play, as one block leaves the other.
+        """
+        playable = self.playable()
+        opponent_wins = self.winning_cells(3 - self.turn)
+        forced = playable & opponent_wins
+        if forced:
+            if forced & (forced - 1):
+                return 0
+            playable = forced
+        # never play right below a cell that wins for the opponent
+        return playable & ~(opponent_wins >> 1)
+
+    def is_full(self):
+        """
+        Checks if every cell of the board is occupied.
+        """
+        return self.ply == self.num_rows * self.num_cols
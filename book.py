@@ -0,0 +1,184 @@
+"""
+Builds and reads opening books: the best move and score of every position within the
+first plies of the game, found by a deep search ahead of time. Build one from the
+repository root with:
+
+    python book.py --rows 6 --cols 7 --plies 4 --depth 7 --workers 8
+
+The book is written to books/<rows>x<cols>.book, where the game looks for it.
+"""
+import argparse, mmap, os, struct, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import Bitboard
+from players import MiniMaxComputer
+
+MAGIC = b"C4BK"
+VERSION = 2
+# magic, version, number of rows, number of columns, search depth, number of records
+HEADER = struct.Struct("<4sHHHHI")
+# canonical key of the position, score for the player to move, best column in the orientation of the key
+RECORD = struct.Struct("<Qqh")
+
+
+def default_path(num_rows, num_cols):
+    """
+    Returns the path of the book of a board size in the books directory next to this module.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "books", f"{num_rows}x{num_cols}.book")
+
+
+class OpeningBook:
+    def __init__(self, path):
+        """
+        Opens a book file. The file is memory-mapped rather than read, so the pages that
+        lookups touch are loaded on demand and shared by every process that opens it.
+
+        Args:
+        - path (str): The path of the book file.
+        """
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.num_rows, self.num_cols, self.depth, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError(f"{path} is not an opening book of version {VERSION}")
+        if len(self.data) != HEADER.size + self.count * RECORD.size:
+            self.data.close()
+            raise ValueError(f"{path} is truncated")
+
+    def lookup(self, position):
+        """
+        Finds a position by binary search over the records, which are sorted by key. A
+        position and its reflection share a record.
+
+        Args:
+        - position (Bitboard): The position to look up.
+
+        Returns:
+        - tuple: The best column and its score for the player to move, or None if the position is not in the book.
+        """
+        key, mirrored = position.canonical()
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record_key, score, move = RECORD.unpack_from(self.data, HEADER.size + middle * RECORD.size)
+            if record_key == key:
+                return (position.mirror_move(move) if mirrored else move), score
+            if record_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def close(self):
+        """
+        Unmaps the file.
+
+        Returns:
+        - None
+        """
+        self.data.close()
+
+
+def book_positions(num_rows, num_cols, plies):
+    """
+    Lists every position reachable in fewer than the given number of moves from the empty
+    board in which the game is not over, once each however many move orders lead to it
+    and leaving out reflections of positions already listed.
+
+    Returns:
+    - list: The positions as nested-list boards.
+    """
+    boards = []
+    seen = set()
+    frontier = [Bitboard(num_rows, num_cols)]
+    for _ in range(plies):
+        next_frontier = []
+        for position in frontier:
+            boards.append(position.to_board())
+            for col in position.legal_moves():
+                position.play(col)
+                key, _ = position.canonical()
+                if key not in seen and not position.last_move_won() and not position.is_full():
+                    seen.add(key)
+                    next_frontier.append(position.copy())
+                position.undo()
+        frontier = next_frontier
+    return boards
+
+
+# the players of a book building process, one per side, keeping their transposition tables between positions
+worker_players = {}
+
+
+def search_position(board, depth):
+    """
+    Searches a position of the book for the player to move.
+
+    Args:
+    - board (list): The board state as a 2D list of integers.
+    - depth (int): The depth of the search below each move.
+
+    Returns:
+    - tuple: The canonical key of the position, the best column in the orientation of the key and its score.
+    """
+    position = Bitboard.from_board(board)
+    if position.turn not in worker_players:
+        worker_players[position.turn] = MiniMaxComputer(position.turn, None, depth, tt_size_mb=64)
+    player = worker_players[position.turn]
+    player.prepare(board)
+    best_move, scores = player.search_root(player.candidate_moves(), depth)
+    key, mirrored = position.canonical()
+    return key, position.mirror_move(best_move) if mirrored else best_move, scores[best_move]
+
+
+def build_book(num_rows, num_cols, plies, depth, path, workers=1):
+    """
+    Searches every position within the first plies and writes the results to a book file.
+
+    Args:
+    - num_rows (int): The number of rows in the game board.
+    - num_cols (int): The number of columns in the game board.
+    - plies (int): Positions with fewer moves played than this are included.
+    - depth (int): The depth of the search below each move of a position.
+    - path (str): The path of the book file to write.
+    - workers (int): The number of processes to search with. Default is 1.
+
+    Returns:
+    - int: The number of positions written.
+    """
+    boards = book_positions(num_rows, num_cols, plies)
+    if workers == 1:
+        results = [search_position(board, depth) for board in boards]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(search_position, boards, [depth] * len(boards), chunksize=16))
+    results.sort()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # write next to the destination and rename, so that a running game never maps a half-written book
+    with open(path + ".tmp", "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, num_rows, num_cols, depth, len(results)))
+        for key, move, score in results:
+            file.write(RECORD.pack(key, score, move))
+    os.replace(path + ".tmp", path)
+    return len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds an opening book for MiniMaxComputer.")
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--cols", type=int, default=7)
+    parser.add_argument("--plies", type=int, default=4, help="include the positions with fewer moves played than this")
+    parser.add_argument("--depth", type=int, default=7, help="search depth below each move of a position")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="book file to write; default books/<rows>x<cols>.book")
+    args = parser.parse_args()
+
+    path = args.output or default_path(args.rows, args.cols)
+    start = time.perf_counter()
+    count = build_book(args.rows, args.cols, args.plies, args.depth, path, args.workers)
+    print(f"{count} positions written to {path} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -67,4 +67,103 @@ def check_tie(board, num_cols):
     for col in range(num_cols):
         if board[0][col] == 0:
             return False
-    return True
\ No newline at end of file
+    return True
+
+
+def immediate_wins(position):
+    """
+    Finds the moves that win at once for the player to move.
+
+    Args:
+    - position (Bitboard): The position to check.
+
+    Returns:
+    - int: The mask of the playable cells that complete four in a row for the player to move.
+    """
+    return position.winning_cells(position.turn) & position.playable()
+
+
+def forced_blocks(position):
+    """
+    Finds the moves the player to move must make to stop the opponent from winning at once.
+
+    Args:
+    - position (Bitboard): The position to check.
+
+    Returns:
+    - int: The mask of the playable cells that complete four in a row for the opponent.
+    """
+    return position.winning_cells(3 - position.turn) & position.playable()
+
+
+def search_moves(position):
+    """
+    Finds the moves worth searching: the immediate wins if there are any, otherwise the moves
+    that neither leave an opponent's win unblocked nor let the opponent win right above the
+    piece played, otherwise, when every move loses, all of them.
+
+    Args:
+    - position (Bitboard): The position to check.
+
+    Returns:
+    - int: The mask of the playable cells to search.
+    """
+    wins = immediate_wins(position)
+    if wins:
+        return wins
+    return position.non_losing_moves() or position.playable()
+
+
+def forced_move(position):
+    """
+    Finds a move that needs no search: an immediate win, or the only move that does not lose at once.
+
+    Args:
+    - position (Bitboard): The position to check.
+
+    Returns:
+    - int: The column to play, or None if the move has to be searched.
+    """
+    moves = immediate_wins(position)
+    if not moves:
+        moves = position.non_losing_moves()
+        # several safe moves are left to the search, and so is a lost position
+        if not moves or moves & (moves - 1):
+            return None
+    # the column of the lowest cell of the mask
+    return ((moves & -moves).bit_length() - 1) // position.stride
+
+
+def check_board(board):
+    """
+    Checks that a nested-list board can be reached in a game: a rectangular list of rows of
+    0, 1 and 2, with no piece above an empty cell, and player 1, who moves first, having as
+    many pieces as player 2 or one more.
+
+    Args:
+    - board (list): The board state as a 2D list of integers.
+
+    Returns:
+    - int: The player to move.
+
+    Raises:
+    - ValueError: If the board cannot be reached in a game.
+    """
+    if not isinstance(board, list) or not board or not all(isinstance(row, list) for row in board):
+        raise ValueError("board must be a list of rows")
+    num_cols = len(board[0])
+    if not num_cols or any(len(row) != num_cols for row in board):
+        raise ValueError("board rows must all have the same number of cells")
+    # True and False compare equal to 1 and 0, so the type is checked too
+    if any(type(cell) is not int or cell not in (0, 1, 2) for row in board for cell in row):
+        raise ValueError("board cells must be 0, 1 or 2")
+    for col in range(num_cols):
+        # the first row is the top one, so a column reads empty cells then pieces
+        cells = [row[col] for row in board]
+        height = len(cells) - cells.count(0)
+        if 0 in cells[len(cells) - height:]:
+            raise ValueError(f"board has a piece above an empty cell in column {col}")
+    counts = [sum(row.count(player) for row in board) for player in (1, 2)]
+    if not 0 <= counts[0] - counts[1] <= 1:
+        raise ValueError("player 1 moves first, so must have as many pieces as player 2 or one more")
+    return 1 if counts[0] == counts[1] else 2
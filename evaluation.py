@@ -0,0 +1,244 @@
+import json
+
+DEFAULT_WEIGHTS = {
+    "four_in_a_row": 10000000000,
+    "three_in_a_row": 100,
+    "two_in_a_row": 10,
+    "open_three": 100,
+    "open_two": 1,
+    "threat": 100,
+    "double_threat": 100000000,
+    "block": 100,
+    "central_column": 100
+}
+
+
+def load_weights(path):
+    """
+    Reads a weights file, as written by tuner.py: a JSON object mapping heuristics to their weights.
+    Heuristics missing from the file keep their default weight.
+
+    Args:
+    - path (str): The path of the weights file.
+
+    Returns:
+    - dict: The weight of each heuristic, with the keys of DEFAULT_WEIGHTS.
+    """
+    with open(path) as file:
+        weights = json.load(file)
+    unknown = set(weights) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError(f"{path} has unknown heuristics: {', '.join(sorted(unknown))}")
+    return dict(DEFAULT_WEIGHTS, **{name: int(value) for name, value in weights.items()})
+
+
+def shift(mask, offset):
+    """
+    Moves the bit of every cell onto the cell `offset` bits below it, so that bit p of the
+    result holds bit p + offset of the mask. Bits moved below zero are dropped.
+    """
+    return mask >> offset if offset >= 0 else mask << -offset
+
+
+class Evaluator:
+    def __init__(self, num_rows, num_cols, weights=None):
+        """
+        Precomputes everything needed to score positions of one board size.
+
+        This gives the same scores as the original cell-by-cell heuristic, but treats
+        all windows of four cells at once. A window is identified by the bit of the
+        cell it starts from, and for each direction the pieces of its i-th cell are
+        brought onto that bit with one shift of the player masks. Adding up the four
+        shifted masks bit-slice by bit-slice gives, in a handful of big-integer
+        operations, a mask of the windows holding exactly k pieces of a player.
+
+        Args:
+        - num_rows (int): The number of rows in the game board.
+        - num_cols (int): The number of columns in the game board.
+        - weights (dict): The weight of each heuristic, with the keys of DEFAULT_WEIGHTS. Default is DEFAULT_WEIGHTS.
+        """
+        self.num_rows = num_rows
+        self.num_cols = num_cols
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.stride = stride = num_rows + 3
+        # windows run right, down, down-right and down-left from their starting cell;
+        # "down" is towards bit 0 of a column
+        self.offsets = [tuple(step * i for i in range(4)) for step in (stride, -1, stride - 1, -stride - 1)]
+        self.board_mask = self.mask_of(lambda row, col: True)
+        # cells whose neighbours are looked at by the pattern bonuses, as in the original bounds checks
+        self.open_three_right = self.mask_of(lambda row, col: 0 < row < num_rows - 1 and 0 < col < num_cols - 2)
+        self.open_three_left = self.mask_of(lambda row, col: 0 < row < num_rows - 1 and 1 < col)
+        self.open_two_right = self.mask_of(lambda row, col: 0 < row < num_rows - 2 and 0 < col < num_cols - 3)
+        self.open_two_left = self.mask_of(lambda row, col: 0 < row < num_rows - 2 and 2 < col)
+        self.double_threat = self.mask_of(lambda row, col: 0 < row < num_rows - 1 and 0 < col < num_cols - 1)
+        # the central column bonus is given to every window start in it, whatever the board holds
+        self.central_score = 4 * num_rows * self.weights["central_column"]
+        self.region_masks = {}
+        # finding the columns holding pieces only pays for itself on large boards
+        self.sliced = num_rows * num_cols > 100
+
+    def mask_of(self, condition):
+        """
+        Returns the mask of the cells (row, col) of the nested-list board for which condition(row, col) is true.
+        """
+        mask = 0
+        for row in range(self.num_rows):
+            for col in range(self.num_cols):
+                if condition(row, col):
+                    mask |= 1 << (col * self.stride + self.num_rows - 1 - row)
+        return mask
+
+    def evaluate(self, position, player):
+        """
+        Evaluates a position for a player. On large boards, only the windows starting within
+        three columns of the columns holding pieces are scored: every heuristic needs a piece
+        in its window, so the others score nothing, and with few pieces most of the work is saved.
+
+        Args:
+        - position (Bitboard): The position to evaluate.
+        - player (int): The player the score is given for.
+
+        Returns:
+        - int: The score of the position for the player, equal to the original heuristic.
+        """
+        own = position.masks[player - 1]
+        opp = position.masks[2 - player]
+        pieces = own | opp
+        if self.sliced and pieces:
+            first = max(0, ((pieces & -pieces).bit_length() - 1) // self.stride - 3)
+            last = min(self.num_cols - 1, (pieces.bit_length() - 1) // self.stride + 3)
+            if first > 0 or last < self.num_cols - 1:
+                return self.region(own, opp, first, last) + self.central_score
+        masks = (self.board_mask, self.open_three_right, self.open_three_left, self.open_two_right, self.open_two_left, self.double_threat)
+        return self.score(own, opp, self.board_mask, masks) + self.central_score
+
+    def local(self, position, player, col):
+        """
+        Evaluates only the windows and pattern bonuses that can see a cell of the given
+        column. The change in this score when a piece is dropped into the column is the
+        change in the score of the whole position.
+
+        Args:
+        - position (Bitboard): The position to evaluate.
+        - player (int): The player the score is given for.
+        - col (int): The column of the cell that changes.
+
+        Returns:
+        - int: The partial score of the position for the player.
+        """
+        return self.region(position.masks[player - 1], position.masks[2 - player], max(0, col - 3), min(self.num_cols - 1, col + 3))
+
+    def region(self, own, opp, first, last):
+        """
+        Scores the windows starting in columns first to last.
+
+        Args:
+        - own (int): The pieces of the player the score is given for.
+        - opp (int): The pieces of the opponent.
+        - first (int): The first column of window starts.
+        - last (int): The last column of window starts.
+
+        Returns:
+        - int: The score of the windows, without the central column bonus.
+        """
+        if (first, last) not in self.region_masks:
+            self.region_masks[(first, last)] = self.make_region_masks(first, last)
+        base, width, starts, masks = self.region_masks[(first, last)]
+        return self.score((own >> base) & width, (opp >> base) & width, masks[0], (starts,) + masks[1:])
+
+    def make_region_masks(self, first, last):
+        """
+        Cuts the board down to the columns that windows starting in columns first to last
+        can reach, three more on each side. Cells further away are never read, so the
+        slice can be scored as if it were the whole board.
+
+        Returns:
+        - tuple: The bit the slice starts at, the mask of its bits, the mask of the window starts and the sliced masks.
+        """
+        base = max(0, first - 3) * self.stride
+        width = (1 << ((min(self.num_cols - 1, last + 3) + 1) * self.stride - base)) - 1
+        starts = self.mask_of(lambda row, col: first <= col <= last)
+        masks = (self.board_mask, self.open_three_right, self.open_three_left, self.open_two_right, self.open_two_left, self.double_threat)
+        return base, width, (starts >> base) & width, tuple((mask >> base) & width for mask in masks)
+
+    def score(self, own, opp, board_mask, masks):
+        """
+        Scores the windows starting at the cells of masks[0].
+
+        Args:
+        - own (int): The pieces of the player the score is given for.
+        - opp (int): The pieces of the opponent.
+        - board_mask (int): The cells of the board.
+        - masks (tuple): The window starts and the bounds of the pattern bonuses, as built in __init__.
+
+        Returns:
+        - int: The score of the windows, without the central column bonus.
+        """
+        starts, open_three_right, open_three_left, open_two_right, open_two_left, double_threat = masks
+        weights = self.weights
+        stride = self.stride
+        empty = board_mask & ~(own | opp)
+
+        # x . . / . _ . / . . x patterns next to a window start, for either player
+        own_three_bonus = (shift(own, stride + 1) & shift(empty, stride) & shift(own, 2 * stride - 1) & open_three_right,
+                           shift(own, -stride + 1) & shift(empty, -stride) & shift(own, -2 * stride - 1) & open_three_left)
+        opp_three_bonus = (shift(opp, stride + 1) & shift(empty, stride) & shift(opp, 2 * stride - 1) & open_three_right,
+                           shift(opp, -stride + 1) & shift(empty, -stride) & shift(opp, -2 * stride - 1) & open_three_left)
+        own_two_bonus = (shift(own, stride + 1) & shift(empty, stride) & shift(own, 3 * stride - 2) & open_two_right,
+                         shift(own, -stride + 1) & shift(empty, -stride) & shift(own, -3 * stride - 2) & open_two_left)
+        opp_two_bonus = (shift(opp, stride + 1) & shift(empty, stride) & shift(opp, 3 * stride - 2) & open_two_right,
+                         shift(opp, -stride + 1) & shift(empty, -stride) & shift(opp, -3 * stride - 2) & open_two_left)
+        # all four diagonal neighbours of the window start empty
+        empty_corners = (shift(empty, -stride + 1) & shift(empty, stride + 1) & shift(empty, -stride - 1)
+                         & shift(empty, stride - 1) & double_threat)
+
+        fours = threes = twos = open_threes = open_twos = double_threats = 0
+        for offsets in self.offsets:
+            own_counts = self.count(own, offsets, starts)
+            opp_counts = self.count(opp, offsets, starts)
+            empty_counts = self.count(empty, offsets, starts)
+            empty_one = empty_counts[0] & ~empty_counts[1]
+            empty_two = empty_counts[1] & ~empty_counts[0]
+
+            own_four = own_counts[2]
+            own_three = own_counts[0] & own_counts[1] & empty_one
+            own_two = own_counts[1] & ~own_counts[0] & empty_two
+            opp_four = opp_counts[2]
+            opp_three = opp_counts[0] & opp_counts[1] & empty_one
+            opp_two = opp_counts[1] & ~opp_counts[0] & empty_two
+            own_one = own_counts[0] & ~own_counts[1] & empty_two
+
+            fours += own_four.bit_count() - opp_four.bit_count()
+            threes += own_three.bit_count() - opp_three.bit_count()
+            twos += own_two.bit_count() - opp_two.bit_count()
+            open_threes += ((own_three & own_three_bonus[0]).bit_count() + (own_three & own_three_bonus[1]).bit_count()
+                            - (opp_three & opp_three_bonus[0]).bit_count() - (opp_three & opp_three_bonus[1]).bit_count())
+            open_twos += ((own_two & own_two_bonus[0]).bit_count() + (own_two & own_two_bonus[1]).bit_count()
+                          - (opp_two & opp_two_bonus[0]).bit_count() - (opp_two & opp_two_bonus[1]).bit_count())
+            double_threats += (own_one & empty_corners).bit_count()
+
+        # the "threat" and "block" heuristics repeat the conditions of "two_in_a_row" and never apply
+        return (fours * weights["four_in_a_row"] + threes * weights["three_in_a_row"] + twos * weights["two_in_a_row"]
+                + open_threes * weights["open_three"] + open_twos * weights["open_two"]
+                + double_threats * weights["double_threat"])
+
+    @staticmethod
+    def count(mask, offsets, starts):
+        """
+        Counts, for every window start, how many of the four cells of the window are in mask.
+
+        Returns:
+        - tuple: The bits of the counts (1, 2 and 4) as masks of window starts.
+        """
+        cell0 = mask & starts
+        cell1 = shift(mask, offsets[1]) & starts
+        cell2 = shift(mask, offsets[2]) & starts
+        cell3 = shift(mask, offsets[3]) & starts
+        low = cell0 ^ cell1
+        high = cell2 ^ cell3
+        carry_low = cell0 & cell1
+        carry_high = cell2 & cell3
+        carry = low & high
+        return (low ^ high,
+                carry_low ^ carry_high ^ carry,
+                (carry_low & carry_high) | (carry & (carry_low ^ carry_high)))
@@ -1,309 +1,174 @@
-import sys
+import sys, os
 import qdarktheme
-from PyQt6.QtWidgets import QApplication, QMainWindow, QPushButton, QGridLayout, QWidget, QLabel, QSpinBox, QMessageBox, QComboBox
-from PyQt6.QtGui import QIcon, QPixmap, QPainter, QBrush, QPen
-from PyQt6.QtCore import Qt
-import random, time, math, copy
+from PyQt6.QtWidgets import QApplication, QMainWindow, QPushButton, QGridLayout, QWidget, QLabel, QSpinBox, QDoubleSpinBox, QMessageBox, QComboBox, QCheckBox
+from PyQt6.QtGui import QIcon, QPixmap, QPainter, QBrush, QPen, QColor
+from PyQt6.QtCore import Qt, QThread, QRectF, pyqtSignal
 from checkers import check_win, check_tie
+from players import Human, MiniMaxComputer, MCTSComputer, players_dict
+from book import OpeningBook, default_path
 
 
-class Player:
-    def __init__(self, name, color, depth):
-        self.name = name
-        self.color = color
-        self.depth = depth
+class SearchThread(QThread):
+    move_found = pyqtSignal(int)
 
-class Human(Player):
-    def __init__(self, name, color, depth):
-        super().__init__(name, color, depth)
+    def __init__(self, player, game):
+        """
+        Prepares a thread that asks a computer player for its move, so that the search
+        does not block the Qt event loop.
 
-class RandomComputer(Player):
-    def __init__(self, name, color, depth):
-        super().__init__(name, color, depth)
+        Args:
+        - player (Player): The computer player to move.
+        - game (Connect4): The game object. Its board must not change until the thread has finished.
+        """
+        super().__init__()
+        self.player = player
+        self.game = game
 
-    def play(self, game):
-        board = game.board
-        available_cols = [col for col in range(len(board[0])) if board[0][col] == 0]
-        if available_cols:
-            return random.choice(available_cols)
-        else:
-            return None
-        
-class MiniMaxComputer(Player):
-    def __init__(self, name, color, depth):
-        super().__init__(name, color, depth)
-        self.depth = depth
-        self.opp_name = 2 if self.name == 1 else 1
-        self.memo = {}
+    def run(self):
+        """
+        Runs the search and emits move_found with its result, unless it was cancelled.
 
-    def play(self, game):
+        Returns:
+        - None
         """
-        Plays a turn of the game using the minimax algorithm.
+        col = self.player.play(self.game)
+        if col is not None and not self.isInterruptionRequested():
+            self.move_found.emit(col)
+
+
+class PonderThread(QThread):
+    def __init__(self, player, board):
+        """
+        Prepares a thread in which a computer player searches the replies of its opponent
+        while the opponent thinks.
 
         Args:
-        - game (Connect4): The game object.
+        - player (MiniMaxComputer): The computer player that has just moved.
+        - board (list): The board state as a 2D list of integers, with the opponent to move.
+        """
+        super().__init__()
+        self.player = player
+        self.board = board
+
+    def run(self):
+        """
+        Ponders until the player is told to stop or has searched every reply deep enough.
 
         Returns:
-        - int: The column in which to place the current player's piece.
-        """
-        # set the initial best score to negative infinity
-        best_score = -math.inf
-        # set the initial best move to None
-        best_move = None
-        # loop through all possible moves
-        for col in range(game.num_cols):
-            # check if the move is valid
-            if game.board[0][col] == 0:
-                # make a copy of the board
-                self.board_copy = copy.deepcopy(game.board)
-                # simulate the move on the board copy
-                row = game.num_rows - 1
-                while row >= 0 and self.board_copy[row][col] != 0:
-                    row -= 1
-                self.board_copy[row][col] = self.name
-                # evaluate the move using the minimax function with a given depth and alpha-beta pruning
-                score = self.minimax(self.board_copy, self.depth, -math.inf, math.inf, False, game, row, col)
-                # update the best score and best move if the score is higher than the current best score
-                if score > best_score:
-                    best_score = score
-                    best_move = col
-        # return the best move
-        return best_move
-
-    def minimax(self, board, depth, alpha, beta, is_maximizing, game, row, col):
-        """
-        Evaluates a board state using the minimax algorithm with a given depth and alpha-beta pruning.
+        - None
+        """
+        self.player.ponder(self.board)
+
+
+class BoardWidget(QWidget):
+    column_clicked = pyqtSignal(int)
+
+    def __init__(self, board, colors):
+        """
+        Creates a widget that paints the game board itself, so that the cost of creating
+        it does not grow with the board and a move repaints only the cell it fills.
 
         Args:
-        - board (list): The board state as a 2D list of integers.
-        - depth (int): The depth of the search tree.
-        - alpha (float): The best score for the maximizing player.
-        - beta (float): The best score for the minimizing player.
-        - is_maximizing (bool): True if the current player is maximizing, False otherwise.
+        - board (list): The board state as a 2D list of integers. The widget reads it when painting and never changes it.
+        - colors (dict): The color name of each player number.
+        """
+        super().__init__()
+        self.board = board
+        self.num_rows = len(board)
+        self.num_cols = len(board[0])
+        self.brushes = {0: QBrush(QColor("blue"))}
+        for name, color in colors.items():
+            self.brushes[name] = QBrush(QColor(color))
+        self.pen = QPen(QColor("black"), 1)
+        # cells of at least 4 pixels, and of 40 on boards small enough
+        cell_size = max(4, min(40, 480 // max(self.num_rows, self.num_cols)))
+        self.setMinimumSize(cell_size * self.num_cols, cell_size * self.num_rows)
+
+    def cell_geometry(self):
+        """
+        Returns the size of the square cells and the position of the top left corner of the
+        board, which is centered in the widget.
 
         Returns:
-        - float: The score of the board state.
+        - tuple: The cell size, and the x and y of the corner, in pixels.
         """
-        # check if the game is over or the depth is zero
-        if check_win(self.board_copy, row, col, game.num_rows, game.num_cols) or check_tie(self.board_copy, game.num_cols) or depth == 0:
-            # return a heuristic score based on the board state
-            return self.evaluate(self.board_copy, game)
-        
-        # check if the board state has already been evaluated
-        board_str = str(board)
-        if board_str in self.memo:
-            return self.memo[board_str]
-        
-        # check if the current player is maximizing
-        if is_maximizing:
-            # set the initial best score to negative infinity
-            best_score = -math.inf
-            # loop through all possible moves
-            for col in range(game.num_cols):
-                # check if the move is valid
-                if board[0][col] == 0:
-                    # make a copy of the board
-                    self.board_copy = copy.deepcopy(board)
-                    # simulate the move on the board copy
-                    row = game.num_rows - 1
-                    while row >= 0 and self.board_copy[row][col] != 0:
-                        row -= 1
-                    self.board_copy[row][col] = self.name
-                    # recursively evaluate the move using the minimax function with a reduced depth and alpha-beta pruning
-                    score = self.minimax(self.board_copy, depth-1, alpha, beta, False, game, row, col)
-                    # update the best score and alpha if the score is higher than the current best score
-                    best_score = max(best_score, score)
-                    alpha = max(alpha, best_score)
-                    # break out of the loop if alpha is greater than or equal to beta (pruning)
-                    if alpha >= beta:
-                        break
-            # store the best score in the memoization table
-            self.memo[board_str] = best_score
-            # return the best score
-            return best_score
-        
-        else: # if the current player is minimizing
-            # set the initial best score to positive infinity
-            best_score = math.inf
-            # loop through all possible moves
-            for col in range(game.num_cols):
-                # check if the move is valid
-                if board[0][col] == 0:
-                    # make a copy of the board
-                    self.board_copy = copy.deepcopy(board)
-                    # simulate the move on the board copy
-                    row = game.num_rows - 1
-                    while row >= 0 and self.board_copy[row][col] != 0:
-                        row -= 1
-                    self.board_copy[row][col] = self.opp_name
-                    # recursively evaluate the move using the minimax function with a reduced depth and alpha-beta pruning
-                    score = self.minimax(self.board_copy, depth-1, alpha, beta, True, game, row, col)
-                    # update the best score and beta if the score is lower than the current best score
-                    best_score = min(best_score, score)
-                    beta = min(beta, best_score)
-                    # break out of the loop if alpha is greater than or equal to beta (pruning)
-                    if alpha >= beta:
-                        break
-            # store the best score in the memoization table
-            self.memo[board_str] = best_score
-            # return the best score
-            return best_score
-
-    def evaluate(self, board, game):
-        """
-        Evaluate the current state of the board for the current player.
-
-        Parameters:
-        board (list): The current state of the board.
-        game (Game): The current game object.
+        cell_size = min(self.width() / self.num_cols, self.height() / self.num_rows)
+        return cell_size, (self.width() - cell_size * self.num_cols) / 2, (self.height() - cell_size * self.num_rows) / 2
+
+    def cell_rect(self, row, col):
+        """
+        Returns the rectangle of a cell as a QRectF.
+        """
+        cell_size, left, top = self.cell_geometry()
+        return QRectF(left + col * cell_size, top + row * cell_size, cell_size, cell_size)
+
+    def update_cell(self, row, col):
+        """
+        Schedules a repaint of a single cell after its piece changed.
 
         Returns:
-        int: The score of the current state of the board for the current player.
+        - None
         """
+        # one pixel more on each side for the border and antialiasing
+        self.update(self.cell_rect(row, col).toAlignedRect().adjusted(-1, -1, 1, 1))
 
-        # set the initial score to zero
-        score = 0
+    def paintEvent(self, event):
+        """
+        Paints the cells that intersect the area to repaint.
 
-        # define the weights for each heuristic
-        weights = {
-            "four_in_a_row": 10000000000,
-            "three_in_a_row": 100,
-            "two_in_a_row": 10,
-            "open_three": 100,
-            "open_two": 1,
-            "threat": 100,
-            "double_threat": 100000000,
-            "block": 100,
-            "central_column": 100
-        }
+        Args:
+        - event (QPaintEvent): The paint event.
 
-        # loop through all possible directions (horizontal, vertical, diagonal, anti-diagonal)
-        for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
-
-            # loop through all possible starting positions
-            for r in range(game.num_rows):
-                for c in range(game.num_cols):
-
-                    # count the number of pieces for each player in a window of size 4
-                    count = {self.name: 0, self.opp_name: 0, 0: 0}
-                    for i in range(4):
-                        nr = r + dr * i
-                        nc = c + dc * i
-
-                        # check if the position is valid
-                        if nr >= 0 and nr < game.num_rows and nc >= 0 and nc < game.num_cols:
-
-                            # update the count for the player at that position
-                            if board[nr][nc] in count:
-                                count[board[nr][nc]] += 1
-
-                    # update the score based on the count
-
-                    # if the window has 4 pieces for the current player, add a large positive value
-                    if count[self.name] == 4:
-                        score += weights["four_in_a_row"]
-
-                    # if the window has 3 pieces for the current player and one empty space, add a smaller positive value
-                    elif count[self.name] == 3 and count[0] == 1:
-
-                        # if the window has 2 pieces and then an empty space and then another 1 piece, add a larger positive value
-                        if r > 0 and r < game.num_rows-1 and c > 0 and c < game.num_cols-2:
-                            if board[r-1][c+1] == self.name and board[r][c+1] == 0 and board[r+1][c+2] == self.name:
-                                score += weights["open_three"]
-
-                        # if the window has 2 pieces and then an empty space and then another 1 piece, add a larger positive value
-                        if r > 0 and r < game.num_rows-1 and c > 1 and c < game.num_cols:
-                            if board[r-1][c-1] == self.name and board[r][c-1] == 0 and board[r+1][c-2] == self.name:
-                                score += weights["open_three"]
-
-                        score += weights["three_in_a_row"]
-
-                    # if the window has 2 pieces for the current player and two empty spaces, add an even smaller positive value
-                    elif count[self.name] == 2 and count[0] == 2:
-
-                        # if the window has 1 piece and then two empty spaces and then another 1 piece, add a larger positive value
-                        if r > 0 and r < game.num_rows-2 and c > 0 and c < game.num_cols-3:
-                            if board[r-1][c+1] == self.name and board[r][c+1] == 0 and board[r+2][c+3] == self.name:
-                                score += weights["open_two"]
-
-                        # if the window has 1 piece and then two empty spaces and then another 1 piece, add a larger positive value
-                        if r > 0 and r < game.num_rows-2 and c > 2 and c < game.num_cols:
-                            if board[r-1][c-1] == self.name and board[r][c-1] == 0 and board[r+2][c-3] == self.name:
-                                score += weights["open_two"]
-
-                        score += weights["two_in_a_row"]
-
-                    # if the window has 4 pieces for the opponent player, subtract a large negative value
-                    elif count[self.opp_name] == 4:
-                        score -= weights["four_in_a_row"]
-
-                    # if the window has 3 pieces for the opponent player and one empty space, subtract a smaller negative value
-                    elif count[self.opp_name] == 3 and count[0] == 1:
-
-                        # if the window has 2 pieces and then an empty space and then another 1 piece, subtract a larger negative value
-                        if r > 0 and r < game.num_rows-1 and c > 0 and c < game.num_cols-2:
-                            if board[r-1][c+1] == self.opp_name and board[r][c+1] == 0 and board[r+1][c+2] == self.opp_name:
-                                score -= weights["open_three"]
-
-                        # if the window has 2 pieces and then an empty space and then another 1 piece, subtract a larger negative value
-                        if r > 0 and r < game.num_rows-1 and c > 1 and c < game.num_cols:
-                            if board[r-1][c-1] == self.opp_name and board[r][c-1] == 0 and board[r+1][c-2] == self.opp_name:
-                                score -= weights["open_three"]
-
-                        score -= weights["three_in_a_row"]
-
-                    # if the window has 2 pieces for the opponent player and two empty spaces, subtract an even smaller negative value
-                    elif count[self.opp_name] == 2 and count[0] == 2:
-
-                        # if the window has 1 piece and then two empty spaces and then another 1 piece, subtract a larger negative value
-                        if r > 0 and r < game.num_rows-2 and c > 0 and c < game.num_cols-3:
-                            if board[r-1][c+1] == self.opp_name and board[r][c+1] == 0 and board[r+2][c+3] == self.opp_name:
-                                score -= weights["open_two"]
-
-                        # if the window has 1 piece and then two empty spaces and then another 1 piece, subtract a larger negative value
-                        if r > 0 and r < game.num_rows-2 and c > 2 and c < game.num_cols:
-                            if board[r-1][c-1] == self.opp_name and board[r][c-1] == 0 and board[r+2][c-3] == self.opp_name:
-                                score -= weights["open_two"]
-
-                        score -= weights["two_in_a_row"]
-
-                    # check for threats (3 in a row with an empty space on either end)
-                    elif count[self.name] == 2 and count[0] == 2:
-                        if r > 0 and r < game.num_rows-1 and c > 0 and c < game.num_cols-1:
-                            if board[r-1][c-1] == 0 and board[r-1][c+1] == 0 and board[r+1][c-1] == self.name and board[r+1][c+1] == self.name:
-                                score += weights["threat"]
-                            if board[r-1][c-1] == self.name and board[r-1][c+1] == self.name and board[r+1][c-1] == 0 and board[r+1][c+1] == 0:
-                                score += weights["threat"]
-
-                    # check for double threats (3 in a row with empty spaces on both ends)
-                    elif count[self.name] == 1 and count[0] == 2:
-                        if r > 0 and r < game.num_rows-1 and c > 0 and c < game.num_cols-1:
-                            if board[r-1][c-1] == 0 and board[r-1][c+1] == 0 and board[r+1][c-1] == 0 and board[r+1][c+1] == 0:
-                                score += weights["double_threat"]
-
-                    # check for blocks (3 in a row for the opponent with an empty space on either end)
-                    elif count[self.opp_name] == 2 and count[0] == 2:
-                        if r > 0 and r < game.num_rows-1 and c > 0 and c < game.num_cols-1:
-                            if board[r-1][c-1] == 0 and board[r-1][c+1] == 0 and board[r+1][c-1] == self.opp_name and board[r+1][c+1] == self.opp_name:
-                                score += weights["block"]
-                            if board[r-1][c-1] == self.opp_name and board[r-1][c+1] == self.opp_name and board[r+1][c-1] == 0 and board[r+1][c+1] == 0:
-                                score += weights["block"]
+        Returns:
+        - None
+        """
+        cell_size, left, top = self.cell_geometry()
+        area = event.rect()
+        first_col = max(0, int((area.left() - left) // cell_size))
+        last_col = min(self.num_cols - 1, int((area.right() - left) // cell_size))
+        first_row = max(0, int((area.top() - top) // cell_size))
+        last_row = min(self.num_rows - 1, int((area.bottom() - top) // cell_size))
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(self.pen)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                painter.setBrush(self.brushes[self.board[row][col]])
+                painter.drawRoundedRect(QRectF(left + col * cell_size, top + row * cell_size, cell_size, cell_size), 20, 20, Qt.SizeMode.RelativeSize)
+        painter.end()
+
+    def mousePressEvent(self, event):
+        """
+        Emits column_clicked with the column under a left click.
+
+        Args:
+        - event (QMouseEvent): The mouse event.
+
+        Returns:
+        - None
+        """
+        cell_size, left, top = self.cell_geometry()
+        col = int((event.position().x() - left) // cell_size)
+        if event.button() == Qt.MouseButton.LeftButton and 0 <= col < self.num_cols:
+            self.column_clicked.emit(col)
 
-                    # check for central columns (pieces in the middle columns are more valuable)
-                    if c == game.num_cols // 2:
-                        score += weights["central_column"]
 
-        return score
 class Connect4(QMainWindow):
-    def __init__(self, num_rows=6, num_cols=7, player1_type = "Human", player2_type = "RandomComputer", depth=3):
+    def __init__(self, num_rows=6, num_cols=7, player1_type = "Human", player2_type = "RandomComputer", depth=3, time_limit=None, workers=1, ponder=False, radius=3):
         """
         Initializes the Connect4 game window with the specified number of rows and columns, and the types of players.
 
         Args:
         - num_rows (int): The number of rows in the game board. Default is 6.
         - num_cols (int): The number of columns in the game board. Default is 7.
-        - player1_type (str): The type of player 1. Can be "Human" or "RandomComputer". Default is "Human".
-        - player2_type (str): The type of player 2. Can be "Human" or "RandomComputer". Default is "RandomComputer".
+        - player1_type (str): The type of player 1, a key of players_dict. Default is "Human".
+        - player2_type (str): The type of player 2, a key of players_dict. Default is "RandomComputer".
+        - depth (int): The search depth of computer players. Default is 3.
+        - time_limit (float): The time budget per move of computer players in seconds, or None for a fixed-depth search. Default is None.
+        - workers (int): The number of processes a computer player searches with. Default is 1.
+        - ponder (bool): Whether computer players search on the time of a human opponent. Default is False.
+        - radius (int): On boards of more than 100 cells, computer players only search the columns within this
+          many columns of a piece, or None to search every column. Default is 3.
         """
         super().__init__()
         self.setWindowTitle("Connect 4")
@@ -315,44 +180,37 @@ class Connect4(QMainWindow):
         self.num_rows = num_rows
         self.num_cols = num_cols
         self.board = [[0 for _ in range(self.num_cols)] for _ in range(self.num_rows)]
-        self.players_dict = {"Human": Human, "RandomComputer": RandomComputer, "MiniMaxComputer": MiniMaxComputer}
-        self.players = [self.players_dict[player1_type](1, "red", depth), self.players_dict[player2_type](2, "green", depth)]
+        self.players_dict = players_dict
+        self.players = [self.players_dict[player1_type](1, "red", depth, time_limit, workers), self.players_dict[player2_type](2, "green", depth, time_limit, workers)]
+        # computer players share the opening book of the board size, if one has been built
+        book = OpeningBook(default_path(num_rows, num_cols)) if os.path.exists(default_path(num_rows, num_cols)) else None
+        for player in self.players:
+            if isinstance(player, MiniMaxComputer):
+                player.book = book
+                player.radius = radius
         self.current_player = self.players[0]
+        self.search_thread = None
+        self.ponder = ponder
+        self.ponder_thread = None
         self.create_board()
         self.create_turn_label()
 
         # render the window
         self.show()
-        self.play()
+        self.next_turn()
 
     def create_board(self):
         """
-        Creates the Connect4 game board with buttons and labels.
+        Creates the Connect4 game board as a single painted widget. Clicking a column plays in it.
 
         Returns:
         - None
         """
-        # add an empty row at the top
-        self.grid_layout.addWidget(QLabel(), 0, 0, 1, self.num_cols)
-        # add the buttons to the empty row
-        for col in range(self.num_cols):
-            button = QPushButton(str(col+1))
-            button.clicked.connect(lambda _, col=col: self.play(col))
-            self.grid_layout.addWidget(button, 1, col)
-        # add the labels to the rest of the grid
-        for row in range(self.num_rows):
-            for col in range(self.num_cols):
-                label = QLabel()
-                label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                label.setStyleSheet("background-color: blue; border: 1px solid black; border-radius: 20%;")
-                self.grid_layout.addWidget(label, row+2, col)
-
-        # set minimum size of widget containing the board
-        widget = self.grid_layout.parentWidget()
-        min_dimension = min(widget.width(), widget.height())
-        cell_size = min_dimension // max(self.num_rows, self.num_cols)
-        widget.setMinimumSize(cell_size * self.num_cols, cell_size * self.num_rows)
-            
+        self.board_widget = BoardWidget(self.board, {player.name: player.color for player in self.players})
+        self.board_widget.column_clicked.connect(self.play)
+        self.grid_layout.addWidget(self.board_widget, 0, 0)
+        self.grid_layout.setRowStretch(0, 1)
+
     def create_turn_label(self):
         """
         Creates the label indicating whose turn it is.
@@ -360,50 +218,151 @@ class Connect4(QMainWindow):
         Returns:
         - None
         """
-        self.turn_label = QLabel(f"Player {self.current_player.name} turn")
+        self.turn_label = QLabel()
         self.turn_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.grid_layout.addWidget(self.turn_label, 1, 0)
+        self.update_turn_label()
+
+    def update_turn_label(self):
+        """
+        Shows the current player in the turn label.
+
+        Returns:
+        - None
+        """
+        self.turn_label.setText(f"Player {self.current_player.name} turn")
         self.turn_label.setStyleSheet(f"color: {self.current_player.color};")
         
-        # remove the old label if it exists
-        if self.grid_layout.itemAtPosition(self.num_rows+2, 0) is not None:
-            self.grid_layout.itemAtPosition(self.num_rows+2, 0).widget().setParent(None)
-        self.grid_layout.addWidget(self.turn_label, self.num_rows+2, 0, 1, self.num_cols)
-        
-    def play(self, col = None):
+    def play(self, col):
         """
-        Plays a turn of the game, either by a human player or a computer player.
+        Plays the move of a human player who clicked a column of the board. Clicks are ignored while a computer player is to move.
 
         Args:
-        - col (int): The column in which to place the current player's piece. If None, the function will determine the move for a computer player.
+        - col (int): The column in which to place the current player's piece.
+
+        Returns:
+        - None
+        """
+        if isinstance(self.current_player, Human) and self.board[0][col] == 0:
+            self.stop_pondering()
+            self.make_move(col)
+
+    def next_turn(self):
+        """
+        Starts the search of the current player in a background thread if it is a computer player.
+        Its move is played by computer_moved once the thread delivers it, so games between
+        computer players advance one event at a time instead of recursing. If a human is to
+        move instead, a computer opponent ponders in the background when pondering is on.
+
+        Returns:
+        - None
+        """
+        if isinstance(self.current_player, Human):
+            opponent = self.players[1] if self.current_player == self.players[0] else self.players[0]
+            if self.ponder and isinstance(opponent, MiniMaxComputer):
+                opponent.start_pondering()
+                self.ponder_thread = PonderThread(opponent, [row[:] for row in self.board])
+                self.ponder_thread.start()
+        else:
+            self.search_thread = SearchThread(self.current_player, self)
+            self.search_thread.move_found.connect(self.computer_moved)
+            self.search_thread.start()
+
+    def computer_moved(self, col):
+        """
+        Plays the move found by the search thread of the current computer player.
+
+        Args:
+        - col (int): The column chosen by the computer player.
+
+        Returns:
+        - None
+        """
+        # the thread is returning from run; let it finish before it is replaced
+        self.search_thread.wait()
+        if isinstance(self.current_player, (MiniMaxComputer, MCTSComputer)):
+            self.show_search_stats(self.current_player)
+        self.make_move(col)
+
+    def make_move(self, col):
+        """
+        Places the current player's piece, checks for the end of the game and passes the turn.
+
+        Args:
+        - col (int): The column in which to place the current player's piece.
 
         Returns:
         - None
         """
-        QApplication.processEvents()
-        if not isinstance(self.current_player, Human):
-            col = self.current_player.play(self)
-        if col is None:
-            return
         row = self.num_rows - 1
         while row >= 0 and self.board[row][col] != 0:
             row -= 1
         if row < 0:
             return
         self.board[row][col] = self.current_player.name
-        label = self.grid_layout.itemAtPosition(row+2, col).widget()
-        label.setStyleSheet(f"background-color: {self.current_player.color}; border: 1px solid black; border-radius: 20%;")
-        QApplication.processEvents()
+        self.board_widget.update_cell(row, col)
         if check_win(self.board, row, col, self.num_rows, self.num_cols):
             self.show_result_dialog(f"Player {self.current_player.name} won!")
         elif check_tie(self.board, self.num_cols):
             self.show_result_dialog("Tie game!")
         else:
             self.current_player = self.players[1] if self.current_player == self.players[0] else self.players[0]
-            self.create_turn_label()
-        
-        if not isinstance(self.current_player, Human):
-            self.play()
+            self.update_turn_label()
+            self.next_turn()
     
+    def stop_pondering(self):
+        """
+        Stops the pondering computer player, if any, and waits for its thread so that it can search again.
+
+        Returns:
+        - None
+        """
+        if self.ponder_thread is not None:
+            self.ponder_thread.player.stop_pondering()
+            self.ponder_thread.wait()
+            self.ponder_thread = None
+
+    def closeEvent(self, event):
+        """
+        Cancels a running search and releases the resources of the players when the window is closed.
+
+        Args:
+        - event (QCloseEvent): The close event.
+
+        Returns:
+        - None
+        """
+        self.stop_pondering()
+        for player in self.players:
+            player.cancel()
+        if self.search_thread is not None:
+            self.search_thread.requestInterruption()
+            self.search_thread.wait()
+        for player in self.players:
+            player.close()
+        super().closeEvent(event)
+
+    def show_search_stats(self, player):
+        """
+        Shows the size and speed of the last search of a computer player in the status bar.
+
+        Args:
+        - player (MiniMaxComputer or MCTSComputer): The player that just searched.
+
+        Returns:
+        - None
+        """
+        if isinstance(player, MCTSComputer):
+            win_rate = f", win rate {player.best_score:.0%}" if player.best_score is not None else ""
+            self.statusBar().showMessage(f"Player {player.name}: {player.nodes} playouts in {player.search_time:.2f}s ({player.nodes_per_second:.0f} playouts/s){win_rate}, {player.reused} reused from the last move")
+            return
+        if player.solved is not None:
+            result, plies = player.solved
+            outcome = "draw" if result == 0 else f"{'win' if result > 0 else 'loss'} in {plies} moves"
+            self.statusBar().showMessage(f"Player {player.name}: solved, {outcome}, {player.nodes} nodes in {player.search_time:.2f}s")
+            return
+        self.statusBar().showMessage(f"Player {player.name}: {player.nodes} nodes in {player.search_time:.2f}s ({player.nodes_per_second:.0f} nodes/s), depth {player.depth_reached}, branching factor {player.branching_factor:.2f}, first-move cutoffs {player.first_move_cutoff_rate:.0%}, cache hit rate {player.tt.hit_rate:.0%} ({player.tt.mirror_hit_rate:.0%} from reflections)")
+
     def show_result_dialog(self, message):
         """
         Shows a dialog indicating the result of the game.
@@ -465,11 +424,13 @@ class Connect4Setup(QWidget):
         self.player1_dropdown.addItem("Human")
         self.player1_dropdown.addItem("RandomComputer")
         self.player1_dropdown.addItem("MiniMaxComputer")
+        self.player1_dropdown.addItem("MCTSComputer")
 
         self.player2_dropdown = QComboBox()
         self.player2_dropdown.addItem("Human")
         self.player2_dropdown.addItem("RandomComputer")
         self.player2_dropdown.addItem("MiniMaxComputer")
+        self.player2_dropdown.addItem("MCTSComputer")
         self.player2_dropdown.setCurrentIndex(2)
 
         self.grid_layout.addWidget(QLabel("Player 1:"), 2, 0)
@@ -479,15 +440,45 @@ class Connect4Setup(QWidget):
 
         self.start_button = QPushButton("Start game")
         self.start_button.clicked.connect(self.start_game)
-        self.grid_layout.addWidget(self.start_button, 4, 0, 1, 4)
+        self.grid_layout.addWidget(self.start_button, 5, 0, 1, 4)
 
         self.depth = QSpinBox()
         self.depth.setMinimum(1)
         self.depth.setMaximum(10000)
         self.depth.setValue(3)
 
-        self.grid_layout.addWidget(QLabel("Depth:"), 3, 1)
-        self.grid_layout.addWidget(self.depth, 3, 2)
+        self.grid_layout.addWidget(QLabel("Depth:"), 3, 0)
+        self.grid_layout.addWidget(self.depth, 3, 1)
+
+        # 0 means no time limit, the fixed depth is searched
+        self.time_limit = QDoubleSpinBox()
+        self.time_limit.setMinimum(0)
+        self.time_limit.setMaximum(3600)
+        self.time_limit.setSingleStep(0.5)
+        self.time_limit.setValue(0)
+
+        self.grid_layout.addWidget(QLabel("Seconds per move:"), 3, 2)
+        self.grid_layout.addWidget(self.time_limit, 3, 3)
+
+        self.workers = QSpinBox()
+        self.workers.setMinimum(1)
+        self.workers.setMaximum(os.cpu_count() or 1)
+        self.workers.setValue(1)
+
+        self.grid_layout.addWidget(QLabel("Worker processes:"), 1, 0)
+        self.grid_layout.addWidget(self.workers, 1, 1)
+
+        self.ponder = QCheckBox("Think on the human's time")
+        self.grid_layout.addWidget(self.ponder, 1, 2, 1, 2)
+
+        # 0 means every column is searched on large boards too
+        self.radius = QSpinBox()
+        self.radius.setMinimum(0)
+        self.radius.setMaximum(100)
+        self.radius.setValue(3)
+
+        self.grid_layout.addWidget(QLabel("Search radius over 100 cells:"), 4, 0, 1, 2)
+        self.grid_layout.addWidget(self.radius, 4, 2, 1, 2)
         
         
     def start_game(self):
@@ -496,7 +487,11 @@ class Connect4Setup(QWidget):
         player1 = self.player1_dropdown.currentText()
         player2 = self.player2_dropdown.currentText()
         depth = self.depth.value()
-        self.connect4 = Connect4(num_rows, num_cols, player1, player2, depth)
+        time_limit = self.time_limit.value() or None
+        workers = self.workers.value()
+        ponder = self.ponder.isChecked()
+        radius = self.radius.value() or None
+        self.connect4 = Connect4(num_rows, num_cols, player1, player2, depth, time_limit, workers, ponder, radius)
         self.connect4.showMaximized()
         self.connect4.show()
         self.close()
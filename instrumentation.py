@@ -0,0 +1,249 @@
+"""
+Records what MiniMaxComputer does for each move when it is created with instrument=True:
+nodes, leaf evaluations, win checks and the time spent in them, transposition table hits
+and misses, cutoffs, depth and time. The record of the last move is kept as the stats
+attribute of the player, and logged as one JSON line to the "connect4.search" logger:
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    player = MiniMaxComputer(2, "green", 5, instrument=True, profile="cprofile")
+
+Players that are not instrumented run none of this code.
+"""
+import cProfile, io, json, logging, pstats, sys, threading, time
+from collections import Counter
+from bitboard import Bitboard
+from evaluation import Evaluator
+
+logger = logging.getLogger("connect4.search")
+
+# the number of functions listed in the profile of a move
+PROFILE_ENTRIES = 20
+
+
+class SearchStats:
+    def __init__(self, player, move, source):
+        """
+        Creates the record of one move of a player, with the counts the player keeps itself.
+        The counts of work done in worker processes of the parallel search are not included,
+        apart from their nodes.
+
+        Args:
+        - player (MiniMaxComputer): The player that just moved.
+        - move (int): The column played, or None if the search was cancelled.
+        - source (str): What found the move: "book", "forced", "solver", "stored" or "search".
+        """
+        self.player = player.name
+        self.move = move
+        self.source = source
+        self.nodes = player.nodes
+        self.depth_reached = player.depth_reached
+        self.search_time = player.search_time
+        self.nodes_per_second = player.nodes_per_second
+        self.branching_factor = player.branching_factor
+        self.cutoffs = player.cutoffs
+        self.first_move_cutoff_rate = player.first_move_cutoff_rate
+        self.score = player.best_score
+        self.solved = player.solved
+        # full evaluations, one per leaf unless the player updates its score incrementally,
+        # in which case each move applied makes two evaluations of the windows around it instead
+        self.leaf_evaluations = 0
+        self.evaluation_time = 0.0
+        self.incremental_evaluations = 0
+        self.win_checks = 0
+        self.win_check_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_mirror_hits = 0
+        # the most expensive functions of the move, if it was profiled
+        self.profile = None
+
+    def to_dict(self):
+        """
+        Returns the record as a dictionary of JSON values.
+        """
+        return {name: round(value, 6) if isinstance(value, float) else value for name, value in vars(self).items()}
+
+    def to_json(self):
+        """
+        Returns the record as one line of JSON.
+        """
+        return json.dumps(self.to_dict())
+
+
+class CountedBitboard(Bitboard):
+    """
+    A search position that counts and times its win checks in the recorder it is given.
+    """
+
+    def last_move_won(self):
+        start = time.perf_counter()
+        result = Bitboard.last_move_won(self)
+        recorder = self.recorder
+        recorder.win_check_time += time.perf_counter() - start
+        recorder.win_checks += 1
+        return result
+
+
+class CountedEvaluator(Evaluator):
+    """
+    An evaluator that counts and times its evaluations in the recorder it is given.
+    """
+
+    def evaluate(self, position, player):
+        start = time.perf_counter()
+        result = Evaluator.evaluate(self, position, player)
+        recorder = self.recorder
+        recorder.evaluation_time += time.perf_counter() - start
+        recorder.leaf_evaluations += 1
+        return result
+
+    def local(self, position, player, col):
+        start = time.perf_counter()
+        result = Evaluator.local(self, position, player, col)
+        recorder = self.recorder
+        recorder.evaluation_time += time.perf_counter() - start
+        recorder.incremental_evaluations += 1
+        return result
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.001):
+        """
+        Creates a profiler that looks at the function a thread is running at regular intervals
+        from another thread. Unlike cProfile, it does not slow down the thread it watches.
+
+        Args:
+        - interval (float): The seconds between samples. Default is 0.001.
+        """
+        self.interval = interval
+        self.samples = Counter()
+        self.thread_id = None
+        self.running = False
+        self.sampler = None
+
+    def start(self):
+        """
+        Starts sampling the calling thread.
+
+        Returns:
+        - None
+        """
+        self.thread_id = threading.get_ident()
+        self.running = True
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+        self.sampler.start()
+
+    def sample(self):
+        """
+        Counts the function the watched thread is in until the profiler is stopped. Runs in the sampling thread.
+
+        Returns:
+        - None
+        """
+        while self.running:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                code = frame.f_code
+                self.samples[f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno}({code.co_name})"] += 1
+            time.sleep(self.interval)
+
+    def stop(self):
+        """
+        Stops sampling.
+
+        Returns:
+        - list: The functions seen most often and their share of the samples, most frequent first.
+        """
+        self.running = False
+        self.sampler.join()
+        total = sum(self.samples.values()) or 1
+        return [[function, round(count / total, 4)] for function, count in self.samples.most_common(PROFILE_ENTRIES)]
+
+
+class SearchRecorder:
+    def __init__(self, player, profile=None):
+        """
+        Records one move of an instrumented player.
+
+        Args:
+        - player (MiniMaxComputer): The player to record.
+        - profile (str): "cprofile" to profile the move with cProfile, "sampling" to sample it
+          with SamplingProfiler, or None not to profile it.
+        """
+        self.player = player
+        self.profile = profile
+        self.profiler = None
+        self.evaluator = None
+        self.leaf_evaluations = 0
+        self.incremental_evaluations = 0
+        self.evaluation_time = 0.0
+        self.win_checks = 0
+        self.win_check_time = 0.0
+
+    def start(self):
+        """
+        Notes the counters of the transposition table and starts the profiler, if any.
+
+        Returns:
+        - None
+        """
+        tt = self.player.tt
+        self.probes, self.hits, self.mirror_hits = tt.probes, tt.hits, tt.mirror_hits
+        if self.profile == "cprofile":
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.profile == "sampling":
+            self.profiler = SamplingProfiler()
+            self.profiler.start()
+        elif self.profile is not None:
+            raise ValueError(f"unknown profiler {self.profile!r}")
+
+    def attach(self, position, evaluator):
+        """
+        Makes a search position and evaluator report their work to the recorder.
+
+        Args:
+        - position (Bitboard): The search position.
+        - evaluator (Evaluator): The evaluator of the player.
+
+        Returns:
+        - None
+        """
+        position.__class__ = CountedBitboard
+        position.recorder = self
+        evaluator.__class__ = CountedEvaluator
+        evaluator.recorder = self
+        self.evaluator = evaluator
+
+    def finish(self, move, source):
+        """
+        Stops the profiler, puts the evaluator back to normal and logs the record of the move.
+
+        Args:
+        - move (int): The column played, or None if the search was cancelled.
+        - source (str): What found the move, as for SearchStats.
+
+        Returns:
+        - SearchStats: The record of the move.
+        """
+        stats = SearchStats(self.player, move, source)
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(self.profiler, stream=output).sort_stats("cumulative").print_stats(PROFILE_ENTRIES)
+            stats.profile = output.getvalue()
+        elif self.profiler is not None:
+            stats.profile = self.profiler.stop()
+        if self.evaluator is not None:
+            self.evaluator.__class__ = Evaluator
+        stats.leaf_evaluations = self.leaf_evaluations
+        stats.incremental_evaluations = self.incremental_evaluations
+        stats.evaluation_time = self.evaluation_time
+        stats.win_checks = self.win_checks
+        stats.win_check_time = self.win_check_time
+        tt = self.player.tt
+        stats.cache_hits = tt.hits - self.hits
+        stats.cache_misses = tt.probes - self.probes - stats.cache_hits
+        stats.cache_mirror_hits = tt.mirror_hits - self.mirror_hits
+        logger.info(stats.to_json())
+        return stats
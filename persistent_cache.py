@@ -0,0 +1,110 @@
+"""
+Keeps transposition table entries on disk between games, in an SQLite database. Entries
+are stored under a namespace, as scores only mean the same to players that search the
+same way: same board size, same side, same evaluation weights and so on. The database is
+in write-ahead logging mode, so any number of processes can read it while one writes.
+"""
+import sqlite3
+
+# Zobrist keys are unsigned 64-bit integers and SQLite stores signed ones, so every key is
+# stored shifted down by this much, and shifted back up when it is loaded
+SIGNED_LIMIT = 1 << 63
+
+
+class PersistentCache:
+    def __init__(self, path, namespace, max_entries=1000000):
+        """
+        Opens or creates a cache file.
+
+        Args:
+        - path (str): The path of the database file.
+        - namespace (str): The namespace of the entries this cache reads and writes.
+        - max_entries (int): The number of entries, over all namespaces, above which compact drops the shallowest. Default is 1000000.
+        """
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        # wait for a writing process rather than fail at once; the game searches in another thread
+        # than the one that closes the player, and never in both at once
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (namespace TEXT, key INTEGER, depth INTEGER, bound INTEGER, "
+                "score INTEGER, move INTEGER, mirrored INTEGER, PRIMARY KEY (namespace, key)) WITHOUT ROWID")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS entries_depth ON entries (depth)")
+
+    def load(self, tt):
+        """
+        Stores the entries of the namespace in a transposition table, shallowest first so that
+        deeper searches take the depth-preferred slots of the buckets they share.
+
+        Args:
+        - tt (TranspositionTable): The table to fill.
+
+        Returns:
+        - int: The number of entries loaded.
+        """
+        count = 0
+        rows = self.connection.execute(
+            "SELECT key, depth, bound, score, move, mirrored FROM entries WHERE namespace = ? ORDER BY depth", (self.namespace,))
+        for key, depth, bound, score, move, mirrored in rows:
+            tt.store(key + SIGNED_LIMIT, depth, bound, score, move, mirrored)
+            count += 1
+        return count
+
+    def save(self, tt, min_depth=1):
+        """
+        Writes the entries of a transposition table to the namespace. An entry replaces a stored
+        entry of the same position only if it was searched at least as deep.
+
+        Args:
+        - tt (TranspositionTable): The table to save.
+        - min_depth (int): Entries searched less deep than this are not worth keeping. Default is 1.
+
+        Returns:
+        - int: The number of entries written.
+        """
+        namespace = self.namespace
+        rows = [(namespace, key - SIGNED_LIMIT, depth, bound, score, move, mirrored)
+                for key, depth, bound, score, move, mirrored in tt.entries() if depth >= min_depth]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (namespace, key) DO UPDATE SET "
+                "depth = excluded.depth, bound = excluded.bound, score = excluded.score, move = excluded.move, "
+                "mirrored = excluded.mirrored WHERE excluded.depth >= entries.depth", rows)
+        return len(rows)
+
+    def compact(self):
+        """
+        Drops the shallowest entries of the whole file until at most max_entries are left, and
+        gives the space of the write-ahead log back to the file system.
+
+        Returns:
+        - int: The number of entries dropped.
+        """
+        count = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            with self.connection:
+                self.connection.execute(
+                    "DELETE FROM entries WHERE (namespace, key) IN "
+                    "(SELECT namespace, key FROM entries ORDER BY depth LIMIT ?)", (excess,))
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return max(excess, 0)
+
+    def __len__(self):
+        """
+        Returns the number of entries of the namespace.
+        """
+        return self.connection.execute("SELECT COUNT(*) FROM entries WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+
+    def close(self):
+        """
+        Closes the database.
+
+        Returns:
+        - None
+        """
+        self.connection.close()
@@ -0,0 +1,1151 @@
+import random, time, math
+from concurrent.futures import ProcessPoolExecutor, wait
+from bitboard import Bitboard
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from evaluation import Evaluator
+from solver import Solver, StopSearch, score_of
+from checkers import forced_move, search_moves
+from instrumentation import SearchRecorder
+from persistent_cache import PersistentCache
+
+
+class Player:
+    def __init__(self, name, color, depth, time_limit=None, workers=1):
+        self.name = name
+        self.color = color
+        self.depth = depth
+        self.time_limit = time_limit
+        self.workers = workers
+
+    def cancel(self):
+        """
+        Asks a search running in another thread to stop as soon as possible. The player
+        does not search again afterwards.
+
+        Returns:
+        - None
+        """
+
+    def close(self):
+        """
+        Releases the resources held by the player, such as worker processes.
+
+        Returns:
+        - None
+        """
+
+class Human(Player):
+    def __init__(self, name, color, depth, time_limit=None, workers=1):
+        super().__init__(name, color, depth, time_limit, workers)
+
+class RandomComputer(Player):
+    def __init__(self, name, color, depth, time_limit=None, workers=1):
+        super().__init__(name, color, depth, time_limit, workers)
+
+    def play(self, game):
+        board = game.board
+        available_cols = [col for col in range(len(board[0])) if board[0][col] == 0]
+        if available_cols:
+            return random.choice(available_cols)
+        else:
+            return None
+        
+class MiniMaxComputer(Player):
+    # the board size above which the search is limited to the columns near the pieces
+    LOCAL_SEARCH_CELLS = 100
+
+    def __init__(self, name, color, depth, time_limit=None, workers=1, tt_size_mb=16, incremental=False, book=None, solver_threshold=20, mirror_cache=False, radius=3, instrument=False, profile=None, cache_path=None, weights=None):
+        super().__init__(name, color, depth, time_limit, workers)
+        self.tt_size_mb = tt_size_mb
+        self.depth = depth
+        # update the score from the windows around each move instead of scoring every leaf;
+        # scoring whole leaves in batch is faster on boards up to 100x100, so this is off by default
+        self.incremental = incremental
+        self.opp_name = 2 if self.name == 1 else 1
+        # searched positions, kept for the whole game within a fixed memory budget
+        self.tt = TranspositionTable(tt_size_mb)
+        self.nodes = 0
+        self.search_time = 0.0
+        self.nodes_per_second = 0.0
+        self.depth_reached = 0
+        self.deadline = None
+        self.evaluator = None
+        self.pool = None
+        self.cancelled = False
+        # share transposition table entries between a position and its reflection; the heuristic
+        # scores a position and its reflection differently, so this changes scores a little
+        self.mirror_cache = mirror_cache
+        # on boards of more than LOCAL_SEARCH_CELLS cells, only columns within this many columns
+        # of a piece, or holding a cell that wins for a player, are searched; None searches every column
+        self.radius = radius
+        # opening book (book.OpeningBook) whose moves are played without searching, if any
+        self.book = book
+        # positions with at most this many empty cells are solved exactly instead of searched
+        self.solver_threshold = solver_threshold
+        self.solver = None
+        # result and distance of the last solved position, as given by solver.score_of, or None
+        self.solved = None
+        # score of the last move: the heuristic score of the search or the book, the solver
+        # score if the position was solved, or None for a move of the tactical pre-pass
+        self.best_score = None
+        # weights of the evaluation heuristics, as taken by Evaluator; None for evaluation.DEFAULT_WEIGHTS
+        self.weights = weights
+        # SQLite file of persistent_cache.PersistentCache from which the transposition table is filled
+        # when the first position is searched, and to which it is saved when the player is closed
+        self.cache_path = cache_path
+        self.cache = None
+        # record the statistics of every move in stats and log them as JSON, as instrumentation.SearchRecorder
+        # does, profiling each move with "cprofile" or "sampling" if profile is set
+        self.instrument = instrument
+        self.profile = profile
+        self.recorder = None
+        # statistics of the last move (instrumentation.SearchStats) if the player is instrumented, otherwise None
+        self.stats = None
+        # history heuristic: how often, weighted by depth, a column caused a cutoff for each player
+        self.history = None
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def play(self, game):
+        """
+        Plays a turn of the game using the minimax algorithm.
+
+        The search works on a single position that is updated in place by apply and
+        undo, so no board is copied per node. With a time limit, the move comes from
+        iterative deepening instead of a single search at the fixed depth. Otherwise,
+        with more than one worker, the root moves are searched in parallel processes.
+        Positions found in the opening book are not searched at all, nor are positions
+        with an immediate win or a single move that does not lose at once, nor positions
+        already searched deep enough, by pondering for example. Positions close enough
+        to the end of the game are solved exactly.
+
+        Args:
+        - game (Connect4): The game object.
+
+        Returns:
+        - int: The column in which to place the current player's piece, or None if the search was cancelled.
+        """
+        if self.instrument:
+            self.recorder = SearchRecorder(self, self.profile)
+            self.recorder.start()
+        self.prepare(game.board)
+        # age the history of earlier moves so that it follows the game
+        self.history = [[value // 2 for value in values] for values in self.history]
+        self.deadline = None
+        start = time.perf_counter()
+        source = "book"
+        try:
+            best_move = self.book_move()
+            if best_move is None:
+                source = "forced"
+                best_move = forced_move(self.position)
+                self.depth_reached = 0
+            if best_move is None:
+                source = "solver"
+                best_move = self.solved_move(start)
+            if best_move is None:
+                source = "stored"
+                best_move = self.stored_move()
+            if best_move is None:
+                source = "search"
+                if self.time_limit:
+                    best_move = self.iterative_deepening(start + self.time_limit)
+                elif self.workers > 1:
+                    best_move, _ = self.parallel_search_root(game.board, self.candidate_moves(), self.depth)
+                    self.depth_reached = self.depth
+                else:
+                    best_move, _ = self.search_root(self.candidate_moves(), self.depth)
+                    self.depth_reached = self.depth
+        except StopSearch:
+            best_move = None
+        if self.cancelled:
+            best_move = None
+        self.search_time = time.perf_counter() - start
+        self.nodes_per_second = self.nodes / self.search_time if self.search_time > 0 else 0.0
+        if self.recorder is not None:
+            self.stats = self.recorder.finish(best_move, source)
+            self.recorder = None
+        # return the best move
+        return best_move
+
+    def prepare(self, board):
+        """
+        Sets up the search position for a board with this player to move.
+
+        Args:
+        - board (list): The board state as a 2D list of integers.
+
+        Returns:
+        - None
+        """
+        self.position = Bitboard.from_board(board, turn=self.name)
+        num_rows, num_cols = self.position.num_rows, self.position.num_cols
+        if self.evaluator is None or (self.evaluator.num_rows, self.evaluator.num_cols) != (num_rows, num_cols):
+            self.evaluator = Evaluator(num_rows, num_cols, self.weights)
+        if self.recorder is not None:
+            self.recorder.attach(self.position, self.evaluator)
+        if self.incremental:
+            self.score = self.evaluator.evaluate(self.position, self.name)
+            self.score_stack = []
+        self.nodes = 0
+        self.solved = None
+        self.best_score = None
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.root_ply = self.position.ply
+        # central columns take part in more lines, so they are tried first
+        self.static_order = sorted(range(num_cols), key=lambda col: abs(2 * col - (num_cols - 1)))
+        # two killer moves per ply: the last moves that caused a cutoff at that distance from the root
+        self.killers = [[-1, -1] for _ in range(num_rows * num_cols - self.root_ply + 1)]
+        self.local = self.radius is not None and num_rows * num_cols > self.LOCAL_SEARCH_CELLS
+        if self.history is None or len(self.history[0]) != num_cols:
+            self.history = [[0] * num_cols, [0] * num_cols]
+        if self.cache_path is not None:
+            self.open_cache()
+
+    def cache_namespace(self):
+        """
+        Returns the namespace of the persistent cache entries this player can use: those of
+        players with the same board size, side, evaluation weights and moves searched.
+        """
+        weights = ",".join(f"{name}={value}" for name, value in sorted(self.evaluator.weights.items()))
+        radius = self.radius if self.local else None
+        return f"{self.position.num_rows}x{self.position.num_cols} player={self.name} mirror={self.mirror_cache} radius={radius} {weights}"
+
+    def open_cache(self):
+        """
+        Opens the persistent cache of the namespace of the search position and fills the
+        transposition table from it, unless it is open already. The cache of another board
+        size is saved and closed first.
+
+        Returns:
+        - None
+        """
+        namespace = self.cache_namespace()
+        if self.cache is not None:
+            if self.cache.namespace == namespace:
+                return
+            self.close_cache()
+        self.cache = PersistentCache(self.cache_path, namespace)
+        self.cache.load(self.tt)
+
+    def close_cache(self):
+        """
+        Saves the transposition table to the persistent cache, trims the cache file to its size cap and closes it.
+
+        Returns:
+        - None
+        """
+        self.cache.save(self.tt)
+        self.cache.compact()
+        self.cache.close()
+        self.cache = None
+
+    def book_move(self):
+        """
+        Looks the search position up in the opening book, and takes the depth of the book as the depth reached.
+
+        Returns:
+        - int: The book move, or None if there is no book for the board size or the position is not in it.
+        """
+        position = self.position
+        if self.book is None or (self.book.num_rows, self.book.num_cols) != (position.num_rows, position.num_cols):
+            return None
+        entry = self.book.lookup(position)
+        if entry is None or not position.can_play(entry[0]):
+            return None
+        self.depth_reached = self.book.depth
+        self.best_score = entry[1]
+        return entry[0]
+
+    def solved_move(self, start):
+        """
+        Solves the search position if it has few enough empty cells. With a time limit,
+        the solver gets half of it and gives up once that has passed.
+
+        Args:
+        - start (float): The time.perf_counter() value at which the move started.
+
+        Returns:
+        - int: The move that keeps the exact score of the position, or None if the position was not solved.
+        """
+        position = self.position
+        empty = position.num_rows * position.num_cols - position.ply
+        if empty > self.solver_threshold:
+            return None
+        if self.solver is None:
+            self.solver = Solver(self.tt_size_mb)
+        solver = self.solver
+        solver.nodes = 0
+        solver.cancelled = self.cancelled
+        solver.deadline = start + self.time_limit / 2 if self.time_limit else None
+        try:
+            best_move, score = solver.best_move(position)
+        except StopSearch:
+            if self.cancelled:
+                raise
+            return None
+        finally:
+            self.nodes += solver.nodes
+        self.solved = score_of(position, score)
+        self.best_score = score
+        self.depth_reached = empty
+        return best_move
+
+    def stored_move(self):
+        """
+        Looks the search position up in the transposition table, where root searches leave their result.
+
+        Returns:
+        - int: The best move of an exact search of the position at least as deep as this player
+          searches, or None if there is none.
+        """
+        position = self.position
+        key, mirrored = self.tt_key()
+        slot = self.tt.probe(key, mirrored)
+        if slot < 0 or self.tt.bounds[slot] != EXACT or self.tt.depths[slot] < self.depth + 1:
+            return None
+        move = position.mirror_move(self.tt.moves[slot]) if mirrored else self.tt.moves[slot]
+        if move < 0 or not position.can_play(move):
+            return None
+        self.depth_reached = self.tt.depths[slot] - 1
+        self.best_score = self.tt.scores[slot]
+        return move
+
+    def tt_key(self):
+        """
+        Returns the key of the search position in the transposition table and whether it is the hash of its reflection.
+        """
+        return self.position.canonical() if self.mirror_cache else (self.position.hash, False)
+
+    def start_pondering(self):
+        """
+        Lets the next call to ponder run until stop_pondering is called. Call both from the
+        thread that starts the pondering thread, so that a stop is never missed.
+
+        Returns:
+        - None
+        """
+        self.deadline = math.inf
+
+    def stop_pondering(self):
+        """
+        Makes a running call to ponder return as soon as possible.
+
+        Returns:
+        - None
+        """
+        self.deadline = 0
+
+    def ponder(self, board):
+        """
+        Searches the positions the opponent's replies lead to while the opponent thinks,
+        one depth at a time over all replies, the reply the last search expected first.
+        Each root search leaves its result in the transposition table, so that play
+        answers the reply at once if the search got deep enough. Positions the book, the
+        tactical pre-pass or the solver answer quickly are left out.
+
+        Args:
+        - board (list): The board state as a 2D list of integers, with the opponent to move.
+
+        Returns:
+        - None
+        """
+        position = Bitboard.from_board(board, turn=self.opp_name)
+        num_cells = position.num_rows * position.num_cols
+        self.position = position
+        key, mirrored = self.tt_key()
+        slot = self.tt.probe(key, mirrored)
+        expected = -1
+        if slot >= 0:
+            expected = position.mirror_move(self.tt.moves[slot]) if mirrored else self.tt.moves[slot]
+        boards = []
+        for col in sorted(position.legal_moves(), key=lambda col: (col != expected, abs(2 * col - (position.num_cols - 1)))):
+            position.play(col)
+            if not position.last_move_won() and num_cells - position.ply > self.solver_threshold:
+                boards.append(position.to_board())
+            position.undo()
+        try:
+            for depth in range(min(self.depth, num_cells - position.ply - 2) + 1):
+                for reply_board in boards:
+                    self.prepare(reply_board)
+                    if self.book_move() is None and forced_move(self.position) is None:
+                        self.search_root(self.candidate_moves(), depth)
+        except StopSearch:
+            pass
+
+    def candidate_moves(self):
+        """
+        Returns the moves of the search position worth searching, as found by checkers.search_moves, central columns first.
+        """
+        position = self.position
+        candidates = search_moves(position)
+        stride = position.stride
+        heights = position.heights
+        # a column is a candidate if the cell a piece would land in is
+        moves = [col for col in self.static_order if candidates >> (col * stride + heights[col]) & 1]
+        if self.local:
+            nearby = self.nearby_columns()
+            moves = [col for col in moves if nearby >> (col * stride) & 1] or moves
+        return moves
+
+    def nearby_columns(self):
+        """
+        Finds the columns the local search of large boards considers: those within radius
+        columns of a piece, and those holding a cell that would win for either player.
+
+        Returns:
+        - int: A mask with the bottom cell of each such column set.
+        """
+        position = self.position
+        stride = position.stride
+        # a column holds pieces if its bottom cell does
+        occupied = (position.masks[0] | position.masks[1]) & position.bottom_mask
+        if not occupied:
+            return 1 << (self.static_order[0] * stride)
+        nearby = occupied
+        for distance in range(1, self.radius + 1):
+            nearby |= (occupied << distance * stride) | (occupied >> distance * stride)
+        threats = position.winning_cells(1) | position.winning_cells(2)
+        while threats:
+            col = ((threats & -threats).bit_length() - 1) // stride
+            nearby |= 1 << (col * stride)
+            threats &= ~position.column_mask(col)
+        return nearby & position.bottom_mask
+
+    def order_moves(self, tt_move):
+        """
+        Orders the moves of the search position worth searching: the transposition table move first,
+        then the killer moves of the ply, then the rest by history score, central columns first on ties.
+
+        Args:
+        - tt_move (int): The best move stored for the position, or -1.
+
+        Returns:
+        - list: The columns in the order to try them.
+        """
+        position = self.position
+        moves = self.candidate_moves()
+        moves.sort(key=self.history[position.turn - 1].__getitem__, reverse=True)
+        killers = self.killers[position.ply - self.root_ply]
+        for move in (killers[1], killers[0], tt_move):
+            if move in moves:
+                moves.remove(move)
+                moves.insert(0, move)
+        return moves
+
+    def record_cutoff(self, col, depth, index):
+        """
+        Updates the killer moves, history and statistics after a move caused a cutoff.
+
+        Args:
+        - col (int): The move that caused the cutoff.
+        - depth (int): The remaining depth of the node.
+        - index (int): The position of the move in the order it was tried.
+
+        Returns:
+        - None
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        killers = self.killers[self.position.ply - self.root_ply]
+        if killers[0] != col:
+            killers[1] = killers[0]
+            killers[0] = col
+        self.history[self.position.turn - 1][col] += depth * depth
+
+    @property
+    def branching_factor(self):
+        """
+        Returns the effective branching factor of the last search: the number of children per node
+        that a uniform tree of the same depth and size would have.
+        """
+        return self.nodes ** (1 / (self.depth_reached + 1)) if self.nodes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self):
+        """
+        Returns the fraction of cutoffs of the last search that were caused by the first move tried.
+        """
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def iterative_deepening(self, deadline):
+        """
+        Searches the position one depth at a time until the deadline passes or the
+        maximum depth is reached. Each iteration tries the root moves in the order of
+        the scores found by the previous one.
+
+        Args:
+        - deadline (float): The time.perf_counter() value at which the search must stop.
+
+        Returns:
+        - int: The best move of the deepest fully searched iteration.
+        """
+        order = self.candidate_moves()
+        max_depth = min(self.depth, self.position.num_rows * self.position.num_cols - self.position.ply - 1)
+        self.deadline = deadline
+        self.depth_reached = 0
+        best_move = None
+        try:
+            for depth in range(max_depth + 1):
+                best_move, scores = self.search_root(order, depth)
+                self.depth_reached = depth
+                order.sort(key=lambda col: scores[col], reverse=True)
+        except StopSearch:
+            # the position was left mid-search; it is rebuilt on the next call to play
+            if best_move is None:
+                best_move = self.root_best_move if self.root_best_move is not None else order[0]
+        finally:
+            self.deadline = None
+        return best_move
+
+    def search_root(self, moves, depth):
+        """
+        Searches the root moves and picks the highest score, keeping the first of equal moves.
+        Each move is searched with the best score so far as its lower bound, so a move that
+        cannot beat it returns only an upper bound on its score.
+
+        Args:
+        - moves (list): The legal columns, in the order to try them.
+        - depth (int): The depth of the search below each root move.
+
+        Returns:
+        - tuple: The best column and a dict with the score, or upper bound, of every root move.
+        """
+        # set the initial best score to negative infinity
+        best_score = -math.inf
+        # set the initial best move to None
+        self.root_best_move = None
+        scores = {}
+        # loop through all possible moves
+        for col in moves:
+            # simulate the move on the board
+            self.apply(col)
+            # evaluate the move using the minimax function with a given depth and alpha-beta pruning
+            score = self.minimax(depth, best_score, math.inf, False)
+            # take the move back
+            self.undo()
+            scores[col] = score
+            # update the best score and best move if the score is higher than the current best score
+            if score > best_score:
+                best_score = score
+                self.root_best_move = col
+        self.store_root(depth, best_score, self.root_best_move)
+        return self.root_best_move, scores
+
+    def parallel_search_root(self, board, moves, depth):
+        """
+        Searches every root move in a pool of worker processes, each with its own
+        transposition table that it keeps between moves. Every root move is searched
+        with the full window, so the scores are exact, and the chosen move, the first
+        highest score in the order of moves, is the same as that of search_root.
+
+        Args:
+        - board (list): The board state as a 2D list of integers.
+        - moves (list): The legal columns, in the order to try them.
+        - depth (int): The depth of the search below each root move.
+
+        Returns:
+        - tuple: The best column and a dict with the score of every root move.
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(self.name, self.depth, self.tt_size_mb, self.incremental, self.mirror_cache, self.radius, self.weights))
+        futures = [self.pool.submit(search_move, board, col, depth) for col in moves]
+        best_score = -math.inf
+        best_move = None
+        scores = {}
+        for col, future in zip(moves, futures):
+            # wait in short steps so that a cancellation is noticed
+            while not wait([future], timeout=0.05).done:
+                if self.cancelled:
+                    raise StopSearch()
+            score, nodes = future.result()
+            self.nodes += nodes
+            scores[col] = score
+            if score > best_score:
+                best_score = score
+                best_move = col
+        self.store_root(depth, best_score, best_move)
+        return best_move, scores
+
+    def store_root(self, depth, score, move):
+        """
+        Stores the exact result of a root search in the transposition table, as the result of
+        a search one move deeper than that below each root move, and keeps its score as best_score.
+
+        Returns:
+        - None
+        """
+        if move is not None:
+            self.best_score = score
+            key, mirrored = self.tt_key()
+            self.tt.store(key, depth + 1, EXACT, score, self.position.mirror_move(move) if mirrored else move, mirrored)
+
+    def cancel(self):
+        """
+        Asks a search running in another thread to stop as soon as possible. The player
+        does not search again afterwards.
+
+        Returns:
+        - None
+        """
+        self.cancelled = True
+        if self.solver is not None:
+            self.solver.cancelled = True
+
+    def close(self):
+        """
+        Shuts down the worker processes of the parallel search, if any were started, and
+        saves the transposition table to the persistent cache, if there is one.
+        Root moves already being searched by a worker are left to finish in the background.
+
+        Returns:
+        - None
+        """
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        if self.cache is not None:
+            self.close_cache()
+
+    def apply(self, col):
+        """
+        Drops a piece for the player to move into the given column of the search position.
+
+        Args:
+        - col (int): The column in which to place the piece.
+
+        Returns:
+        - None
+        """
+        if self.incremental:
+            before = self.evaluator.local(self.position, self.name, col)
+            self.position.play(col)
+            self.score_stack.append(self.score)
+            self.score += self.evaluator.local(self.position, self.name, col) - before
+        else:
+            self.position.play(col)
+
+    def undo(self):
+        """
+        Takes back the last move made with apply.
+
+        Returns:
+        - None
+        """
+        self.position.undo()
+        if self.incremental:
+            self.score = self.score_stack.pop()
+
+    def minimax(self, depth, alpha, beta, is_maximizing):
+        """
+        Evaluates the search position using the minimax algorithm with a given depth and alpha-beta pruning.
+
+        Args:
+        - depth (int): The depth of the search tree.
+        - alpha (float): The best score for the maximizing player.
+        - beta (float): The best score for the minimizing player.
+        - is_maximizing (bool): True if the current player is maximizing, False otherwise.
+
+        Returns:
+        - float: The score of the board state.
+        """
+        self.nodes += 1
+        if self.cancelled or (self.deadline is not None and time.perf_counter() > self.deadline):
+            raise StopSearch()
+        position = self.position
+        # check if the game is over or the depth is zero
+        if position.last_move_won() or position.is_full() or depth == 0:
+            # return a heuristic score based on the board state
+            if self.incremental:
+                return self.score
+            return self.evaluator.evaluate(position, self.name)
+
+        # check if the board state has already been searched deep enough, and narrow the window with a stored bound
+        tt = self.tt
+        key, mirrored = self.tt_key()
+        slot = tt.probe(key, mirrored)
+        tt_move = -1
+        if slot >= 0:
+            tt_move = position.mirror_move(tt.moves[slot]) if mirrored else tt.moves[slot]
+        if slot >= 0 and tt.depths[slot] >= depth:
+            score = tt.scores[slot]
+            if tt.bounds[slot] == EXACT:
+                return score
+            if tt.bounds[slot] == LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if alpha >= beta:
+                return score
+        window_alpha, window_beta = alpha, beta
+        best_move = -1
+
+        # check if the current player is maximizing
+        if is_maximizing:
+            # set the initial best score to negative infinity
+            best_score = -math.inf
+            # loop through all possible moves, the most promising first
+            for index, col in enumerate(self.order_moves(tt_move)):
+                # simulate the move, evaluate it with a reduced depth and take it back
+                self.apply(col)
+                score = self.minimax(depth-1, alpha, beta, False)
+                self.undo()
+                # update the best score and alpha if the score is higher than the current best score
+                if score > best_score:
+                    best_score = score
+                    best_move = col
+                alpha = max(alpha, best_score)
+                # break out of the loop if alpha is greater than or equal to beta (pruning)
+                if alpha >= beta:
+                    self.record_cutoff(col, depth, index)
+                    break
+            # store the best score in the transposition table
+            self.store(key, mirrored, depth, window_alpha, window_beta, best_score, best_move)
+            # return the best score
+            return best_score
+
+        else: # if the current player is minimizing
+            # set the initial best score to positive infinity
+            best_score = math.inf
+            # loop through all possible moves, the most promising first
+            for index, col in enumerate(self.order_moves(tt_move)):
+                # simulate the move, evaluate it with a reduced depth and take it back
+                self.apply(col)
+                score = self.minimax(depth-1, alpha, beta, True)
+                self.undo()
+                # update the best score and beta if the score is lower than the current best score
+                if score < best_score:
+                    best_score = score
+                    best_move = col
+                beta = min(beta, best_score)
+                # break out of the loop if alpha is greater than or equal to beta (pruning)
+                if alpha >= beta:
+                    self.record_cutoff(col, depth, index)
+                    break
+            # store the best score in the transposition table
+            self.store(key, mirrored, depth, window_alpha, window_beta, best_score, best_move)
+            # return the best score
+            return best_score
+
+    def store(self, key, mirrored, depth, alpha, beta, score, move):
+        """
+        Stores the score of the search position in the transposition table, recording
+        whether it is exact or only a bound because it fell outside the search window.
+
+        Args:
+        - key (int): The key of the position in the table.
+        - mirrored (bool): Whether the key is the hash of the reflection of the position.
+        - depth (int): The depth the position was searched to.
+        - alpha (float): The lower end of the window the position was searched with.
+        - beta (float): The upper end of the window the position was searched with.
+        - score (int): The score found by the search.
+        - move (int): The best column found by the search.
+
+        Returns:
+        - None
+        """
+        if score <= alpha:
+            bound = UPPER
+        elif score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        if mirrored:
+            move = self.position.mirror_move(move)
+        self.tt.store(key, depth, bound, score, move, mirrored)
+
+    def evaluate(self, board, game):
+        """
+        Evaluate the current state of the board for the current player.
+
+        Parameters:
+        board (list): The current state of the board.
+        game (Game): The current game object.
+
+        Returns:
+        int: The score of the current state of the board for the current player.
+        """
+        if self.evaluator is None or (self.evaluator.num_rows, self.evaluator.num_cols) != (game.num_rows, game.num_cols):
+            self.evaluator = Evaluator(game.num_rows, game.num_cols, self.weights)
+        return self.evaluator.evaluate(Bitboard.from_board(board), self.name)
+
+
+class TreeNode:
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins", "winner")
+
+    def __init__(self, move, parent, untried, winner=None):
+        """
+        Creates a node of the tree of MCTSComputer.
+
+        Args:
+        - move (int): The column played to reach the node, or None at the root.
+        - parent (TreeNode): The node the move was played from, or None at the root.
+        - untried (list): The columns not yet expanded, the one to try first last.
+        - winner (int): For a node that ends the game, the player who won, or 0 for a tie; None otherwise.
+        """
+        self.move = move
+        self.parent = parent
+        self.children = {}
+        self.untried = untried
+        self.visits = 0
+        # results of the playouts through the node for the player who made its move: 1 per win, 1/2 per tie
+        self.wins = 0.0
+        self.winner = winner
+
+
+class MCTSComputer(Player):
+    def __init__(self, name, color, depth, time_limit=None, workers=1, playouts=5000, exploration=math.sqrt(2), rollout="biased", seed=None):
+        """
+        Creates a player that searches with Monte Carlo tree search: UCT selection over a tree
+        grown by one node per playout, and random games played to the end from each new node.
+        It needs no evaluation, so it plays on any board size and grows stronger with more playouts.
+
+        Args:
+        - name (int): The player number.
+        - color (str): The color of the player's pieces.
+        - depth (int): Not used; the budget of a move is given by playouts or time_limit.
+        - time_limit (float): The seconds to search each move for. If None, playouts are counted instead.
+        - workers (int): The number of processes to search with, each growing its own tree from the
+          position, whose root statistics are added up. Default is 1.
+        - playouts (int): The number of playouts of a move without a time limit, shared by the workers. Default is 5000.
+        - exploration (float): The weight of the exploration term of UCT. Default is sqrt(2).
+        - rollout (str): "biased" to play winning and blocking moves in the random games, "random" for uniformly random moves. Default is "biased".
+        - seed (int): The seed of the random games, including those of the workers, or None for an unseeded generator.
+        """
+        super().__init__(name, color, depth, time_limit, workers)
+        self.playouts = playouts
+        self.exploration = exploration
+        self.rollout = rollout
+        self.rng = random.Random(seed)
+        # the tree of the last search and the position at its root, kept to answer the next move from
+        self.root = None
+        self.root_position = None
+        # one process per worker, so that each keeps the same tree and random games from move to move
+        self.pools = None
+        self.cancelled = False
+        self.nodes = 0
+        self.search_time = 0.0
+        self.nodes_per_second = 0.0
+        # playouts of the new root that were made during earlier moves
+        self.reused = 0
+        # share of the playouts through the chosen move that it won, or None if it was not searched
+        self.best_score = None
+
+    def play(self, game):
+        """
+        Plays a turn of the game. Immediate wins and the only move that does not lose at once
+        are played without searching. Otherwise the move searched most often is played.
+
+        Args:
+        - game (Connect4): The game object.
+
+        Returns:
+        - int: The column in which to place the current player's piece, or None if the search was cancelled.
+        """
+        start = time.perf_counter()
+        position = Bitboard.from_board(game.board, turn=self.name)
+        self.nodes = 0
+        self.reused = 0
+        self.best_score = None
+        best_move = forced_move(position)
+        if best_move is None:
+            if self.workers > 1:
+                stats = self.parallel_search(game.board)
+            else:
+                stats = self.search(position)
+            if stats:
+                best_move = max(stats, key=lambda col: stats[col][0])
+                visits, wins = stats[best_move]
+                self.best_score = wins / visits if visits else None
+        if self.cancelled:
+            best_move = None
+        self.search_time = time.perf_counter() - start
+        self.nodes_per_second = self.nodes / self.search_time if self.search_time > 0 else 0.0
+        return best_move
+
+    def search(self, position, playouts=None):
+        """
+        Grows the tree from a position until the budget of the move is spent.
+
+        Args:
+        - position (Bitboard): The position to search, with this player to move.
+        - playouts (int): The number of playouts to make without a time limit. Default is the playouts of the player.
+
+        Returns:
+        - dict: The visits and the wins of each move of the root, by column.
+        """
+        root = self.reuse_tree(position)
+        self.root, self.root_position = root, position.copy()
+        deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+        budget = self.playouts if playouts is None else playouts
+        done = 0
+        while not self.cancelled:
+            if deadline is not None:
+                # reading the clock costs about as much as a short playout, so do it every few playouts
+                if done % 16 == 0 and time.perf_counter() > deadline:
+                    break
+            elif done >= budget:
+                break
+            self.playout(root, position)
+            done += 1
+        self.nodes += done
+        return {col: (child.visits, child.wins) for col, child in root.children.items()}
+
+    def reuse_tree(self, position):
+        """
+        Finds the node of the last tree reached by the moves played since its search, and makes it the root.
+
+        Args:
+        - position (Bitboard): The position to search.
+
+        Returns:
+        - TreeNode: The subtree of the position, or a new root if the position is not in the tree.
+        """
+        root = self.root
+        if root is not None and self.root_position is not None:
+            old = self.root_position
+            if (old.num_rows, old.num_cols) == (position.num_rows, position.num_cols) and position.ply == old.ply + 2:
+                for col, child in root.children.items():
+                    old.play(col)
+                    for reply, grandchild in child.children.items():
+                        old.play(reply)
+                        found = old.hash == position.hash
+                        old.undo()
+                        if found:
+                            old.undo()
+                            grandchild.parent = None
+                            self.reused = grandchild.visits
+                            return grandchild
+                    old.undo()
+        return self.new_node(position, None, None)
+
+    def new_node(self, position, move, parent):
+        """
+        Creates the node of a position reached by a move. Only the moves worth searching, as
+        found by checkers.search_moves, are expanded, central columns last so that they come first.
+
+        Returns:
+        - TreeNode: The new node.
+        """
+        if move is not None and position.last_move_won():
+            return TreeNode(move, parent, [], winner=3 - position.turn)
+        if position.is_full():
+            return TreeNode(move, parent, [], winner=0)
+        moves = search_moves(position)
+        stride = position.stride
+        heights = position.heights
+        center = position.num_cols - 1
+        untried = [col for col in range(position.num_cols) if heights[col] < position.num_rows and moves >> (col * stride + heights[col]) & 1]
+        untried.sort(key=lambda col: -abs(2 * col - center))
+        return TreeNode(move, parent, untried)
+
+    def playout(self, root, position):
+        """
+        Makes one playout: descends the tree by UCT, adds a node, plays a random game from it
+        and adds the result to every node on the way. The position is left unchanged.
+
+        Args:
+        - root (TreeNode): The root of the tree.
+        - position (Bitboard): The position of the root.
+
+        Returns:
+        - None
+        """
+        node = root
+        start_ply = position.ply
+        # selection
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            exploration = self.exploration
+            best = None
+            best_value = -1.0
+            for child in node.children.values():
+                value = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+                if value > best_value:
+                    best, best_value = child, value
+            node = best
+            position.play(node.move)
+        # expansion
+        if node.untried:
+            col = node.untried.pop()
+            position.play(col)
+            child = self.new_node(position, col, node)
+            node.children[col] = child
+            node = child
+        # the player who made the move of the last tree node
+        mover = 3 - position.turn
+        # simulation
+        if node.winner is not None:
+            winner = node.winner
+        elif not node.children and not node.untried:
+            # the tree node has no move worth playing, which only happens on a full board
+            winner = 0
+        else:
+            winner = self.random_game(position)
+        while position.ply > start_ply:
+            position.undo()
+        # backpropagation
+        while node is not None:
+            node.visits += 1
+            if winner == 0:
+                node.wins += 0.5
+            elif winner == mover:
+                node.wins += 1
+            mover = 3 - mover
+            node = node.parent
+        return None
+
+    def random_game(self, position):
+        """
+        Plays random moves from a position to the end of the game. Biased rollouts play a winning
+        move when there is one, and otherwise block the opponent's winning move. The moves are
+        left on the position for the caller to undo.
+
+        Args:
+        - position (Bitboard): The position to play from. The game must not be over.
+
+        Returns:
+        - int: The player who won, or 0 for a tie.
+        """
+        rng = self.rng
+        stride = position.stride
+        num_rows = position.num_rows
+        heights = position.heights
+        open_cols = [col for col in range(position.num_cols) if heights[col] < num_rows]
+        biased = self.rollout == "biased"
+        while open_cols:
+            if biased:
+                turn = position.turn
+                playable = position.playable()
+                wins = position.winning_cells(turn) & playable
+                if wins:
+                    return turn
+                blocks = position.winning_cells(3 - turn) & playable
+                col = ((blocks & -blocks).bit_length() - 1) // stride if blocks else rng.choice(open_cols)
+                position.play(col)
+            else:
+                col = rng.choice(open_cols)
+                position.play(col)
+                if position.last_move_won():
+                    return 3 - position.turn
+            if heights[col] == num_rows:
+                open_cols.remove(col)
+        return 0
+
+    def parallel_search(self, board):
+        """
+        Searches the position in every worker process at once, each with its share of the
+        playouts or the whole time limit, and adds up the statistics of the root moves.
+
+        Args:
+        - board (list): The board state as a 2D list of integers, with this player to move.
+
+        Returns:
+        - dict: The visits and the wins of each move of the root, by column.
+        """
+        if self.pools is None:
+            # the seeds of the workers come from the player's generator, so a seeded player searches the same way every time
+            self.pools = [ProcessPoolExecutor(1, initializer=init_mcts_worker, initargs=(self.name, self.time_limit, self.exploration, self.rollout, self.rng.getrandbits(64)))
+                          for _ in range(self.workers)]
+        share = -(-self.playouts // self.workers)
+        futures = [pool.submit(search_mcts_tree, board, share) for pool in self.pools]
+        # wait in short steps so that a cancellation is noticed
+        while wait(futures, timeout=0.05).not_done:
+            if self.cancelled:
+                return {}
+        stats = {}
+        for future in futures:
+            worker_stats, playouts, reused = future.result()
+            self.nodes += playouts
+            self.reused += reused
+            for col, (visits, wins) in worker_stats.items():
+                total_visits, total_wins = stats.get(col, (0, 0.0))
+                stats[col] = (total_visits + visits, total_wins + wins)
+        return stats
+
+    def cancel(self):
+        """
+        Asks a search running in another thread to stop after its current playout. Searches
+        already sent to worker processes run until their budget is spent, but are not waited for.
+
+        Returns:
+        - None
+        """
+        self.cancelled = True
+
+    def close(self):
+        """
+        Shuts down the worker processes of the parallel search, if any.
+
+        Returns:
+        - None
+        """
+        if self.pools is not None:
+            for pool in self.pools:
+                pool.shutdown(wait=False, cancel_futures=True)
+            self.pools = None
+
+
+# the player types by the names shown in the setup window
+players_dict = {"Human": Human, "RandomComputer": RandomComputer, "MiniMaxComputer": MiniMaxComputer, "MCTSComputer": MCTSComputer}
+
+
+# the player of a worker process of the parallel search
+worker_player = None
+
+
+def init_worker(name, depth, tt_size_mb, incremental, mirror_cache, radius, weights):
+    """
+    Creates the player that searches in a worker process of the parallel search.
+    """
+    global worker_player
+    worker_player = MiniMaxComputer(name, None, depth, tt_size_mb=tt_size_mb, incremental=incremental, mirror_cache=mirror_cache, radius=radius, weights=weights)
+
+
+def search_move(board, col, depth):
+    """
+    Searches one root move in a worker process of the parallel search.
+
+    Args:
+    - board (list): The board state as a 2D list of integers, with the searching player to move.
+    - col (int): The root move to search.
+    - depth (int): The depth of the search below the root move.
+
+    Returns:
+    - tuple: The score of the move and the number of nodes searched.
+    """
+    worker_player.prepare(board)
+    worker_player.apply(col)
+    score = worker_player.minimax(depth, -math.inf, math.inf, False)
+    return score, worker_player.nodes
+
+
+# the player of a worker process of the parallel Monte Carlo tree search, keeping its tree between moves
+mcts_worker_player = None
+
+
+def init_mcts_worker(name, time_limit, exploration, rollout, seed):
+    """
+    Creates the player that searches in a worker process of the parallel Monte Carlo tree search.
+    """
+    global mcts_worker_player
+    mcts_worker_player = MCTSComputer(name, None, 0, time_limit, exploration=exploration, rollout=rollout, seed=seed)
+
+
+def search_mcts_tree(board, playouts):
+    """
+    Grows the tree of a worker process from a position.
+
+    Args:
+    - board (list): The board state as a 2D list of integers, with the searching player to move.
+    - playouts (int): The number of playouts to make without a time limit.
+
+    Returns:
+    - tuple: The visits and the wins of each move of the root by column, the number of playouts made,
+      and the number of playouts of the root reused from earlier moves.
+    """
+    mcts_worker_player.nodes = 0
+    stats = mcts_worker_player.search(Bitboard.from_board(board, turn=mcts_worker_player.name), playouts)
+    return stats, mcts_worker_player.nodes, mcts_worker_player.reused
@@ -0,0 +1,256 @@
+"""
+Serves engine moves to many games at once over TCP. Each request and each response is
+one JSON object on its own line:
+
+    {"id": 7, "board": [[0, 0, ...], ...], "player": 2, "depth": 4, "time_limit": null}
+    {"id": 7, "move": 3, "score": 120, "solved": null, "depth": 4, "nodes": 812, "cached": false, "elapsed": 0.031}
+
+Searches run in a bounded pool of processes. Requests that find the pool and its queue full
+are answered at once with {"id": 7, "error": "busy"}, and identical requests are answered
+from a cache of recent results or share the search already under way. No search runs longer
+than MAX_TIME seconds: a fixed-depth search that would is answered from the deepest depth it
+completed, which the response gives. Start it with:
+
+    python server.py --port 8765 --workers 4
+"""
+import argparse, asyncio, json, os, time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from arena import HeadlessGame
+from bitboard import Bitboard
+from book import OpeningBook, default_path
+from checkers import check_board
+from players import MiniMaxComputer
+
+# the largest board and depth accepted, as in the setup window
+MAX_SIZE = 100
+MAX_DEPTH = 10000
+# the longest a search may run, in seconds, with or without a time limit in the request
+MAX_TIME = 10.0
+
+# the number of players a worker process keeps, each with its own transposition table
+WORKER_PLAYERS = 8
+
+# the players of a worker process by board size and side, least recently used first, and the books
+# by board size; their transposition tables are kept between requests
+worker_players = OrderedDict()
+worker_books = {}
+
+
+def search(board, player, depth, time_limit):
+    """
+    Finds the move of a player in a worker process.
+
+    Args:
+    - board (list): The board state as a 2D list of integers.
+    - player (int): The player to move.
+    - depth (int): The search depth, or the maximum depth with a time limit.
+    - time_limit (float): The time budget in seconds, or None for a fixed-depth search.
+
+    Returns:
+    - dict: The move, its score, the solver result if the position was solved, the depth reached and the nodes searched.
+    """
+    num_rows, num_cols = len(board), len(board[0])
+    if (num_rows, num_cols) not in worker_books:
+        path = default_path(num_rows, num_cols)
+        worker_books[(num_rows, num_cols)] = OpeningBook(path) if os.path.exists(path) else None
+    # the depth and time limit are set for each request, so that clients cannot make a
+    # worker keep a table for every setting they send
+    key = (num_rows, num_cols, player)
+    if key in worker_players:
+        worker_players.move_to_end(key)
+    else:
+        worker_players[key] = MiniMaxComputer(player, None, depth, time_limit, book=worker_books[(num_rows, num_cols)])
+        if len(worker_players) > WORKER_PLAYERS:
+            worker_players.popitem(last=False)[1].close()
+    engine = worker_players[key]
+    engine.depth = depth
+    # a request without a time limit is searched to its depth unless that takes longer than
+    # MAX_TIME, in which case the deepest depth completed in time answers it, so that no request
+    # can hold a worker for good
+    engine.time_limit = time_limit or MAX_TIME
+    game = HeadlessGame.from_board(board)
+    move = engine.play(game)
+    return {"move": move, "score": engine.best_score, "solved": engine.solved, "depth": engine.depth_reached, "nodes": engine.nodes}
+
+
+def parse_request(request):
+    """
+    Checks a request and extracts the search settings from it.
+
+    Args:
+    - request (dict): The decoded request.
+
+    Returns:
+    - tuple: The board, the player to move, the depth and the time limit.
+
+    Raises:
+    - ValueError: If the request is not valid.
+    """
+    board = request.get("board")
+    to_move = check_board(board)
+    if not 4 <= len(board) <= MAX_SIZE or not 4 <= len(board[0]) <= MAX_SIZE:
+        raise ValueError(f"board must have 4 to {MAX_SIZE} rows and columns")
+    if not any(cell == 0 for cell in board[0]):
+        raise ValueError("board is full")
+    position = Bitboard.from_board(board)
+    if position.is_win(1) or position.is_win(2):
+        raise ValueError("game is already won")
+    player = request.get("player")
+    # True and False would pass for 1 and 0 in the checks below
+    if isinstance(player, bool) or player not in (1, 2):
+        raise ValueError("player must be 1 or 2")
+    if player != to_move:
+        raise ValueError(f"player {to_move} is to move on this board")
+    depth = request.get("depth", 3)
+    if isinstance(depth, bool) or not isinstance(depth, int) or not 1 <= depth <= MAX_DEPTH:
+        raise ValueError(f"depth must be an integer from 1 to {MAX_DEPTH}")
+    time_limit = request.get("time_limit")
+    if time_limit is not None and (isinstance(time_limit, bool) or not isinstance(time_limit, (int, float)) or not 0 < time_limit <= MAX_TIME):
+        raise ValueError(f"time_limit must be a positive number of seconds up to {MAX_TIME:g}, or null")
+    return board, player, depth, time_limit
+
+
+class MoveServer:
+    def __init__(self, workers=1, queue_limit=64, cache_size=100000):
+        """
+        Creates a move server.
+
+        Args:
+        - workers (int): The number of search processes. Default is 1.
+        - queue_limit (int): The number of searches that may be running or waiting before requests are turned away. Default is 64.
+        - cache_size (int): The number of results kept for repeated requests. Default is 100000.
+        """
+        self.pool = ProcessPoolExecutor(workers)
+        self.queue_limit = queue_limit
+        self.cache_size = cache_size
+        # results by board size, position hash with the player to move, depth and time limit, least recently used first
+        self.cache = OrderedDict()
+        # searches under way by the same keys
+        self.running = {}
+        self.pending = 0
+        self.requests = 0
+        self.cache_hits = 0
+        self.rejected = 0
+
+    async def answer(self, request):
+        """
+        Answers one request.
+
+        Args:
+        - request (dict): The decoded request.
+
+        Returns:
+        - dict: The response, with the id of the request.
+        """
+        start = time.perf_counter()
+        self.requests += 1
+        response = {"id": request.get("id")}
+        try:
+            board, player, depth, time_limit = parse_request(request)
+        except ValueError as error:
+            response["error"] = str(error)
+            return response
+        key = (len(board), len(board[0]), Bitboard.from_board(board, turn=player).hash, depth, time_limit)
+        if key in self.cache:
+            self.cache_hits += 1
+            self.cache.move_to_end(key)
+            response.update(self.cache[key], cached=True)
+        elif key in self.running:
+            # the same position is being searched for another request
+            self.cache_hits += 1
+            response.update(await asyncio.shield(self.running[key]), cached=True)
+        elif self.pending >= self.queue_limit:
+            self.rejected += 1
+            response["error"] = "busy"
+            return response
+        else:
+            self.pending += 1
+            self.running[key] = asyncio.get_running_loop().run_in_executor(self.pool, search, board, player, depth, time_limit)
+            try:
+                result = await asyncio.shield(self.running[key])
+            finally:
+                self.pending -= 1
+                del self.running[key]
+            self.cache[key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            response.update(result, cached=False)
+        response["elapsed"] = round(time.perf_counter() - start, 6)
+        return response
+
+    async def handle(self, reader, writer):
+        """
+        Serves one connection. Requests on it are answered concurrently, each as soon as it is done.
+
+        Args:
+        - reader (asyncio.StreamReader): The stream of requests.
+        - writer (asyncio.StreamWriter): The stream of responses.
+
+        Returns:
+        - None
+        """
+        tasks = set()
+
+        async def respond(line):
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as error:
+                response = {"id": None, "error": f"invalid request: {error}"}
+            else:
+                try:
+                    response = await self.answer(request)
+                except Exception as error:
+                    response = {"id": request.get("id"), "error": f"search failed: {error!r}"}
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(respond(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    def close(self):
+        """
+        Shuts down the search processes.
+
+        Returns:
+        - None
+        """
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(host, port, workers, queue_limit, cache_size):
+    move_server = MoveServer(workers, queue_limit, cache_size)
+    server = await asyncio.start_server(move_server.handle, host, port, limit=2 ** 20)
+    print(f"serving moves on {host}:{port} with {workers} workers", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        move_server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves engine moves as line-delimited JSON over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--queue-limit", type=int, default=64, help="searches running or waiting before requests are answered with busy")
+    parser.add_argument("--cache-size", type=int, default=100000, help="results kept for repeated requests")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.queue_limit, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
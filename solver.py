@@ -0,0 +1,203 @@
+import time
+from transposition import TranspositionTable, LOWER, UPPER
+
+
+class StopSearch(Exception):
+    """
+    Raised inside a search when its time budget runs out or it is cancelled.
+    """
+
+
+class Solver:
+    def __init__(self, tt_size_mb=16):
+        """
+        Creates a solver that finds the game-theoretic value of positions by searching them to the end.
+
+        Scores are given for the player to move: 0 for a draw, a positive score for a
+        win and a negative one for a loss. The sooner the game is won, the larger the
+        score: a player who wins with their last piece but n scores n, counting the
+        pieces left to both players, as score_of does. As the rules are the same on the
+        reflected board, a position and its reflection share their entry in the table.
+
+        Args:
+        - tt_size_mb (float): The memory budget of the transposition table in megabytes. Default is 16.
+        """
+        # scores of a board size mean the same in every game, so the table is kept between positions
+        self.tt = TranspositionTable(tt_size_mb)
+        self.nodes = 0
+        self.deadline = None
+        self.cancelled = False
+        self.position = None
+
+    def solve(self, position):
+        """
+        Finds the exact score of a position, narrowing its bounds with null-window searches,
+        each of which only has to tell whether the score is above a given value.
+
+        Args:
+        - position (Bitboard): The position to solve. It is left unchanged.
+
+        Returns:
+        - int: The score of the position for the player to move.
+        """
+        self.position = position.copy()
+        self.cells = position.num_rows * position.num_cols
+        num_cols = position.num_cols
+        self.static_order = sorted(range(num_cols), key=lambda col: abs(2 * col - (num_cols - 1)))
+        if position.last_move_won():
+            return -((self.cells + 2 - position.ply) // 2)
+        if position.winning_cells(position.turn) & position.playable():
+            return (self.cells + 1 - position.ply) // 2
+        low = -((self.cells - position.ply) // 2)
+        high = (self.cells + 1 - position.ply) // 2
+        while low < high:
+            middle = low + (high - low) // 2
+            # try values closer to zero first, where the score of most positions lies
+            if middle <= 0 and int(low / 2) < middle:
+                middle = int(low / 2)
+            elif middle >= 0 and int(high / 2) > middle:
+                middle = int(high / 2)
+            score = self.negamax(middle, middle + 1)
+            if score <= middle:
+                high = score
+            else:
+                low = score
+        return low
+
+    def best_move(self, position):
+        """
+        Finds a move that keeps the score of a position: the fastest win, or the slowest loss.
+
+        Args:
+        - position (Bitboard): The position to play in. It is left unchanged.
+
+        Returns:
+        - tuple: The best column and the score of the position for the player to move.
+        """
+        score = self.solve(position)
+        position = self.position
+        winning = position.winning_cells(position.turn) & position.playable()
+        non_losing = position.non_losing_moves()
+        if winning:
+            return self.order(winning)[0], score
+        if not non_losing:
+            # every move loses at once
+            return self.order(position.playable())[0], score
+        for col in self.order(non_losing):
+            position.play(col)
+            # the move keeps the score if the opponent cannot score above minus it
+            keeps = -self.negamax(-score, -score + 1) >= score
+            position.undo()
+            if keeps:
+                return col, score
+        return self.order(non_losing)[0], score
+
+    def order(self, moves):
+        """
+        Orders playable cells by the number of winning cells the move gives the player, and central columns first on ties.
+
+        Args:
+        - moves (int): The mask of the playable cells to order.
+
+        Returns:
+        - list: The columns of the cells in the order to try them.
+        """
+        position = self.position
+        player = position.turn
+        columns = []
+        for col in self.static_order:
+            move = moves & position.column_mask(col)
+            if move:
+                position.masks[player - 1] |= move
+                threats = position.winning_cells(player).bit_count()
+                position.masks[player - 1] ^= move
+                columns.append((threats, col))
+        columns.sort(key=lambda entry: entry[0], reverse=True)
+        return [col for _, col in columns]
+
+    def negamax(self, alpha, beta):
+        """
+        Searches the solver position to the end with alpha-beta pruning. The player to
+        move must not be able to win at once.
+
+        Args:
+        - alpha (int): The score the player to move is already sure to reach.
+        - beta (int): The score above which the opponent will not let the game go.
+
+        Returns:
+        - int: The score of the position if it lies between alpha and beta, otherwise a bound on the side it lies.
+        """
+        self.nodes += 1
+        if self.cancelled or (self.deadline is not None and time.perf_counter() > self.deadline):
+            raise StopSearch()
+        position = self.position
+        ply = position.ply
+        moves = position.non_losing_moves()
+        if not moves:
+            # the opponent wins with their next move
+            return -((self.cells - ply) // 2)
+        if ply >= self.cells - 2:
+            # neither player can win with the last two pieces
+            return 0
+        # the player to move cannot win at once, and cannot lose before the opponent's second move
+        low = -((self.cells - 2 - ply) // 2)
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+        high = (self.cells - 1 - ply) // 2
+        tt = self.tt
+        key, mirrored = position.canonical()
+        slot = tt.probe(key, mirrored)
+        if slot >= 0:
+            score = tt.scores[slot]
+            if tt.bounds[slot] == UPPER:
+                high = min(high, score)
+            else:
+                if alpha < score:
+                    alpha = score
+                    if alpha >= beta:
+                        return alpha
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        for col in self.order(moves):
+            position.play(col)
+            score = -self.negamax(-beta, -alpha)
+            position.undo()
+            if score >= beta:
+                tt.store(key, self.cells - ply, LOWER, score, position.mirror_move(col) if mirrored else col, mirrored)
+                return score
+            if score > alpha:
+                alpha = score
+        tt.store(key, self.cells - ply, UPPER, alpha, -1, mirrored)
+        return alpha
+
+
+def score_of(position, score):
+    """
+    Describes a solver score.
+
+    Args:
+    - position (Bitboard): The position the score was found for.
+    - score (int): The score for the player to move.
+
+    Returns:
+    - tuple: The result for the player to move, 1 for a win, 0 for a draw and -1 for a loss,
+      and the number of moves of both players until the winning piece is dropped, that one included.
+    """
+    if score == 0:
+        return 0, 0
+    cells = position.num_rows * position.num_cols
+    if score > 0:
+        # the winner moves at plies of the same parity as the current one
+        last = cells + 1 - 2 * score
+        if (last - position.ply) % 2:
+            last -= 1
+        return 1, last - position.ply + 1
+    last = cells + 1 + 2 * score
+    if (last - position.ply) % 2 == 0:
+        last -= 1
+    return -1, last - position.ply + 1
@@ -0,0 +1,26 @@
+import json, unittest
+from analysis import analyze_positions, read_positions
+
+
+class ReadPositionsTest(unittest.TestCase):
+    def test_bad_lines_become_errors(self):
+        lines = [
+            "[1,2]",
+            json.dumps([[0, 0, 0, 0], [0, 0, 0, 0], [1, 0, 0, 0], [0, 0, 0, 0]]),
+            json.dumps([[0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [2, 0, 0, 0]]),
+            "[[true, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]]",
+            "0x0:",
+            "400x400:1",
+            json.dumps([[0] * 101 for _ in range(4)]),
+            "44444444",
+            json.dumps([[0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [1, 0, 0, 0]]),
+        ]
+        results = list(analyze_positions(read_positions(lines), 1))
+        self.assertEqual([result["line"] for result in results], list(range(1, 10)))
+        for result in results[:-1]:
+            self.assertIn("error", result)
+        self.assertEqual(results[-1]["to_move"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
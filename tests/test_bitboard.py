@@ -0,0 +1,64 @@
+import random, unittest
+from bitboard import Bitboard
+from checkers import check_win
+
+SIZES = ((4, 4), (6, 7), (5, 9), (9, 5), (10, 20))
+
+
+def random_games(rng, num_rows, num_cols, games):
+    """
+    Plays random games to their end, yielding the position and the matching nested-list board
+    after every move, along with the row and column of the move.
+    """
+    for _ in range(games):
+        position = Bitboard(num_rows, num_cols)
+        board = [[0] * num_cols for _ in range(num_rows)]
+        while position.legal_moves():
+            col = rng.choice(position.legal_moves())
+            board[position.next_row(col)][col] = position.turn
+            row = position.play(col)
+            yield position, board, row, col
+            if check_win(board, row, col, num_rows, num_cols):
+                break
+
+
+class BitboardTest(unittest.TestCase):
+    def test_wins_match_check_win(self):
+        rng = random.Random(1)
+        for num_rows, num_cols in SIZES:
+            for position, board, row, col in random_games(rng, num_rows, num_cols, 60):
+                won = check_win(board, row, col, num_rows, num_cols)
+                self.assertEqual(position.last_move_won(), won)
+                self.assertEqual(position.is_win(board[row][col]), won)
+
+    def test_board_round_trip(self):
+        rng = random.Random(2)
+        for num_rows, num_cols in SIZES:
+            for position, board, _, _ in random_games(rng, num_rows, num_cols, 20):
+                self.assertEqual(position.to_board(), board)
+                rebuilt = Bitboard.from_board(board)
+                self.assertEqual(rebuilt.to_board(), board)
+                self.assertEqual((rebuilt.masks, rebuilt.heights, rebuilt.ply, rebuilt.turn), (position.masks, position.heights, position.ply, position.turn))
+
+    def test_from_board_hash_matches_played_hash(self):
+        rng = random.Random(3)
+        for num_rows, num_cols in SIZES:
+            for position, board, _, _ in random_games(rng, num_rows, num_cols, 20):
+                rebuilt = Bitboard.from_board(board)
+                self.assertEqual((rebuilt.hash, rebuilt.mirror_hash), (position.hash, position.mirror_hash))
+
+    def test_undo_restores_the_position(self):
+        rng = random.Random(4)
+        for num_rows, num_cols in SIZES:
+            position = Bitboard(num_rows, num_cols)
+            states = []
+            while position.legal_moves() and not position.last_move_won():
+                states.append((position.masks[:], position.heights[:], position.hash, position.mirror_hash, position.turn))
+                position.play(rng.choice(position.legal_moves()))
+            while states:
+                position.undo()
+                self.assertEqual((position.masks, position.heights, position.hash, position.mirror_hash, position.turn), states.pop())
+
+
+if __name__ == "__main__":
+    unittest.main()
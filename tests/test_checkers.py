@@ -0,0 +1,82 @@
+import random, unittest
+from bitboard import Bitboard
+from checkers import forced_blocks, forced_move, immediate_wins, search_moves
+
+SIZES = ((4, 4), (6, 7), (5, 9), (9, 5))
+
+
+def columns(position, mask):
+    """
+    Returns the set of columns of the cells of a mask.
+    """
+    return {col for col in range(position.num_cols) if mask & position.column_mask(col)}
+
+
+def wins_at_once(position):
+    """
+    Returns the set of columns that win at once for the player to move, by playing each of them.
+    """
+    wins = set()
+    for col in position.legal_moves():
+        position.play(col)
+        if position.last_move_won():
+            wins.add(col)
+        position.undo()
+    return wins
+
+
+def safe_moves(position):
+    """
+    Returns the set of columns after which the opponent cannot win at once, by playing each
+    of them and then every reply.
+    """
+    safe = set()
+    for col in position.legal_moves():
+        position.play(col)
+        if not wins_at_once(position):
+            safe.add(col)
+        position.undo()
+    return safe
+
+
+def random_positions(rng, count):
+    """
+    Plays random games and stops each at a random point before it ends.
+    """
+    positions = []
+    while len(positions) < count:
+        num_rows, num_cols = rng.choice(SIZES)
+        position = Bitboard(num_rows, num_cols)
+        for _ in range(rng.randrange(num_rows * num_cols)):
+            position.play(rng.choice(position.legal_moves()))
+            if position.last_move_won():
+                break
+        if not position.last_move_won() and not position.is_full():
+            positions.append(position)
+    return positions
+
+
+class CheckersTest(unittest.TestCase):
+    def test_tactical_moves_match_brute_force(self):
+        rng = random.Random(14)
+        for position in random_positions(rng, 600):
+            wins = wins_at_once(position)
+            safe = safe_moves(position)
+            self.assertEqual(columns(position, immediate_wins(position)), wins)
+            position.turn = 3 - position.turn
+            threats = wins_at_once(position)
+            position.turn = 3 - position.turn
+            self.assertEqual(columns(position, forced_blocks(position)), threats)
+            self.assertEqual(columns(position, position.non_losing_moves()), safe)
+            self.assertEqual(columns(position, search_moves(position)), wins or safe or set(position.legal_moves()))
+            if wins:
+                expected = min(wins)
+            elif len(safe) == 1:
+                expected = safe.pop()
+            else:
+                expected = None
+            self.assertEqual(forced_move(position), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import random, unittest
+from bitboard import Bitboard
+from evaluation import DEFAULT_WEIGHTS, Evaluator
+
+
+def reference_evaluate(board, name, num_rows, num_cols, weights=DEFAULT_WEIGHTS):
+    """
+    The original cell-by-cell heuristic of MiniMaxComputer.evaluate, which Evaluator must match exactly.
+    """
+    opp_name = 2 if name == 1 else 1
+    score = 0
+    for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+        for r in range(num_rows):
+            for c in range(num_cols):
+                count = {name: 0, opp_name: 0, 0: 0}
+                for i in range(4):
+                    nr = r + dr * i
+                    nc = c + dc * i
+                    if nr >= 0 and nr < num_rows and nc >= 0 and nc < num_cols:
+                        if board[nr][nc] in count:
+                            count[board[nr][nc]] += 1
+                for player, sign in ((name, 1), (opp_name, -1)):
+                    if count[player] == 4:
+                        score += sign * weights["four_in_a_row"]
+                        break
+                    elif count[player] == 3 and count[0] == 1:
+                        if r > 0 and r < num_rows-1 and c > 0 and c < num_cols-2:
+                            if board[r-1][c+1] == player and board[r][c+1] == 0 and board[r+1][c+2] == player:
+                                score += sign * weights["open_three"]
+                        if r > 0 and r < num_rows-1 and c > 1 and c < num_cols:
+                            if board[r-1][c-1] == player and board[r][c-1] == 0 and board[r+1][c-2] == player:
+                                score += sign * weights["open_three"]
+                        score += sign * weights["three_in_a_row"]
+                        break
+                    elif count[player] == 2 and count[0] == 2:
+                        if r > 0 and r < num_rows-2 and c > 0 and c < num_cols-3:
+                            if board[r-1][c+1] == player and board[r][c+1] == 0 and board[r+2][c+3] == player:
+                                score += sign * weights["open_two"]
+                        if r > 0 and r < num_rows-2 and c > 2 and c < num_cols:
+                            if board[r-1][c-1] == player and board[r][c-1] == 0 and board[r+2][c-3] == player:
+                                score += sign * weights["open_two"]
+                        score += sign * weights["two_in_a_row"]
+                        break
+                else:
+                    # the threat and block branches of the original repeat the conditions above and never apply
+                    if count[name] == 1 and count[0] == 2:
+                        if r > 0 and r < num_rows-1 and c > 0 and c < num_cols-1:
+                            if board[r-1][c-1] == 0 and board[r-1][c+1] == 0 and board[r+1][c-1] == 0 and board[r+1][c+1] == 0:
+                                score += weights["double_threat"]
+                if c == num_cols // 2:
+                    score += weights["central_column"]
+    return score
+
+
+def random_position(rng, num_rows, num_cols):
+    """
+    Plays random moves from the empty board, filling a random share of it.
+    """
+    position = Bitboard(num_rows, num_cols)
+    fill = rng.random() ** 2 * num_rows * num_cols
+    while position.ply < fill and position.legal_moves():
+        position.play(rng.choice(position.legal_moves()))
+    return position
+
+
+class EvaluatorTest(unittest.TestCase):
+    def test_matches_reference(self):
+        rng = random.Random(5)
+        for _ in range(150):
+            num_rows, num_cols = rng.randint(4, 9), rng.randint(4, 16)
+            evaluator = Evaluator(num_rows, num_cols)
+            position = random_position(rng, num_rows, num_cols)
+            board = position.to_board()
+            for player in (1, 2):
+                self.assertEqual(evaluator.evaluate(position, player), reference_evaluate(board, player, num_rows, num_cols))
+
+    def test_matches_reference_on_large_boards(self):
+        # boards of more than 100 cells are scored by slices around the pieces
+        rng = random.Random(6)
+        for num_rows, num_cols in ((12, 12), (10, 30)):
+            evaluator = Evaluator(num_rows, num_cols)
+            for _ in range(5):
+                position = Bitboard(num_rows, num_cols)
+                center = rng.randrange(num_cols)
+                for _ in range(rng.randint(1, 12)):
+                    position.play(min(num_cols - 1, max(0, center + rng.randint(-2, 2))))
+                board = position.to_board()
+                for player in (1, 2):
+                    self.assertEqual(evaluator.evaluate(position, player), reference_evaluate(board, player, num_rows, num_cols))
+
+    def test_matches_reference_with_other_weights(self):
+        rng = random.Random(7)
+        weights = {name: rng.randint(1, 1000) for name in DEFAULT_WEIGHTS}
+        evaluator = Evaluator(6, 7, weights)
+        for _ in range(30):
+            position = random_position(rng, 6, 7)
+            board = position.to_board()
+            self.assertEqual(evaluator.evaluate(position, 1), reference_evaluate(board, 1, 6, 7, weights))
+
+    def test_local_change_matches_full_change(self):
+        rng = random.Random(8)
+        for _ in range(40):
+            num_rows, num_cols = rng.randint(4, 9), rng.randint(4, 16)
+            evaluator = Evaluator(num_rows, num_cols)
+            position = random_position(rng, num_rows, num_cols)
+            for col in position.legal_moves():
+                for player in (1, 2):
+                    before = evaluator.evaluate(position, player)
+                    local_before = evaluator.local(position, player, col)
+                    position.play(col)
+                    change = evaluator.evaluate(position, player) - before
+                    local_change = evaluator.local(position, player, col) - local_before
+                    position.undo()
+                    self.assertEqual(local_change, change)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import threading, time, unittest
+from arena import HeadlessGame
+from players import MCTSComputer
+
+
+def game_with(moves, num_rows=6, num_cols=7):
+    """
+    Plays columns from the empty board, the players taking turns from player 1.
+    """
+    game = HeadlessGame(num_rows, num_cols)
+    for ply, col in enumerate(moves):
+        game.drop(col, 1 + ply % 2)
+    return game
+
+
+class MCTSComputerTest(unittest.TestCase):
+    def test_plays_legal_moves(self):
+        # column 0 is full
+        game = game_with([0, 0, 0, 0, 0, 0, 3])
+        player = MCTSComputer(2, None, 0, playouts=300, seed=1)
+        for _ in range(5):
+            col = player.play(game)
+            self.assertIn(col, range(1, 7))
+            game.drop(col, 2)
+            game.drop(next(c for c in range(1, 7) if game.board[0][c] == 0), 1)
+
+    def test_takes_a_forced_win_and_blocks(self):
+        # player 1 has three in column 3 and wins there; player 2 must block it
+        game = game_with([3, 0, 3, 0, 3, 6])
+        self.assertEqual(MCTSComputer(1, None, 0, playouts=50, seed=2).play(game), 3)
+        game = game_with([3, 0, 3, 0, 3])
+        self.assertEqual(MCTSComputer(2, None, 0, playouts=50, seed=3).play(game), 3)
+
+    def test_finds_a_win_two_moves_deep(self):
+        # player 1 makes an open three on the bottom row and wins on the next move, whatever the reply
+        game = game_with([2, 2, 3, 3])
+        player = MCTSComputer(1, None, 0, playouts=2000, seed=4)
+        self.assertIn(player.play(game), (1, 4))
+        self.assertGreater(player.best_score, 0.5)
+
+    def test_reuses_the_tree_of_the_last_move(self):
+        game = game_with([])
+        player = MCTSComputer(1, None, 0, playouts=2000, seed=5)
+        col = player.play(game)
+        game.drop(col, 1)
+        game.drop(3, 2)
+        player.play(game)
+        self.assertGreater(player.reused, 0)
+
+    def test_seeded_players_repeat_their_moves(self):
+        for workers in (1, 2):
+            moves = []
+            for _ in range(2):
+                game = game_with([3, 3])
+                player = MCTSComputer(1, None, 0, workers=workers, playouts=400, seed=6)
+                try:
+                    played = []
+                    for _ in range(3):
+                        col = player.play(game)
+                        played.append(col)
+                        game.drop(col, 1)
+                        game.drop(next(c for c in range(7) if game.board[0][c] == 0), 2)
+                finally:
+                    player.close()
+                moves.append(played)
+            self.assertEqual(moves[0], moves[1])
+
+    def test_cancel_stops_waiting_for_workers(self):
+        # the workers search for three seconds, but the player stops waiting as soon as it is cancelled
+        player = MCTSComputer(1, None, 0, time_limit=3, workers=2, seed=7)
+        result = []
+        thread = threading.Thread(target=lambda: result.append(player.play(game_with([]))))
+        try:
+            start = time.perf_counter()
+            thread.start()
+            time.sleep(0.5)
+            player.cancel()
+            thread.join(5)
+            self.assertLess(time.perf_counter() - start, 2.5)
+            self.assertEqual(result, [None])
+        finally:
+            player.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
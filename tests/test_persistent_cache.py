@@ -0,0 +1,81 @@
+import os, tempfile, unittest
+from arena import HeadlessGame
+from persistent_cache import PersistentCache
+from players import MiniMaxComputer
+from transposition import EXACT, LOWER, TranspositionTable
+
+
+def stored(tt):
+    """
+    Returns the entries of a transposition table by key.
+    """
+    return {entry[0]: entry[1:] for entry in tt.entries()}
+
+
+class PersistentCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_entries_round_trip(self):
+        # keys on both sides of the signed 64-bit limit
+        tt = TranspositionTable(1)
+        tt.store(12345, 4, EXACT, -70, 3)
+        tt.store((1 << 64) - 99, 6, LOWER, 250, 1, True)
+        cache = PersistentCache(self.path, "6x7")
+        self.assertEqual(cache.save(tt), 2)
+        cache.close()
+        cache = PersistentCache(self.path, "6x7")
+        loaded = TranspositionTable(1)
+        self.assertEqual(cache.load(loaded), 2)
+        self.assertEqual(stored(loaded), stored(tt))
+        cache.close()
+        # another namespace sees none of them
+        cache = PersistentCache(self.path, "7x8")
+        self.assertEqual(cache.load(TranspositionTable(1)), 0)
+        cache.close()
+
+    def test_save_keeps_the_deeper_entry(self):
+        cache = PersistentCache(self.path, "6x7")
+        for depth, score in ((5, 10), (3, 20), (7, 30)):
+            tt = TranspositionTable(1)
+            tt.store(777, depth, EXACT, score, 2)
+            cache.save(tt)
+            loaded = TranspositionTable(1)
+            cache.load(loaded)
+            self.assertEqual(stored(loaded)[777][:3], (5, EXACT, 10) if depth == 3 else (depth, EXACT, score))
+        cache.close()
+
+    def test_compact_drops_the_shallowest_entries(self):
+        cache = PersistentCache(self.path, "6x7", max_entries=3)
+        tt = TranspositionTable(1)
+        for key in range(1, 6):
+            tt.store(key, key, EXACT, 0, 0)
+        cache.save(tt)
+        self.assertEqual(cache.compact(), 2)
+        self.assertEqual(len(cache), 3)
+        loaded = TranspositionTable(1)
+        cache.load(loaded)
+        self.assertEqual(sorted(stored(loaded)), [3, 4, 5])
+        cache.close()
+
+    def test_player_warm_loads_the_entries_of_another(self):
+        # the 8x9 board has no opening book, so the first player has to search
+        game = HeadlessGame(8, 9)
+        game.drop(4, 1)
+        first = MiniMaxComputer(2, None, 4, solver_threshold=0, cache_path=self.path)
+        move = first.play(game)
+        first.close()
+        second = MiniMaxComputer(2, None, 4, solver_threshold=0, cache_path=self.path)
+        second.prepare(game.board)
+        self.assertGreater(len(stored(second.tt)), 0)
+        self.assertEqual(second.play(game), move)
+        self.assertLess(second.nodes, first.nodes)
+        second.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import time, unittest
+import server
+from server import parse_request, search
+
+
+def board_with(pieces, num_rows=6, num_cols=7):
+    """
+    Builds a board with pieces given as (row, col, player), row 0 being the top one.
+    """
+    board = [[0] * num_cols for _ in range(num_rows)]
+    for row, col, player in pieces:
+        board[row][col] = player
+    return board
+
+
+class ParseRequestTest(unittest.TestCase):
+    def test_accepts_reachable_boards(self):
+        self.assertEqual(parse_request({"board": board_with([]), "player": 1}), (board_with([]), 1, 3, None))
+        self.assertEqual(parse_request({"board": board_with([(5, 3, 1)]), "player": 2, "depth": 5, "time_limit": 0.5})[1:], (2, 5, 0.5))
+
+    def test_rejects_unreachable_boards(self):
+        boards = [
+            [1, 2],
+            [[0] * 7] * 5 + [[0, 0, 0, True, 0, 0, 0]],
+            board_with([(3, 3, 1)]),
+            board_with([(5, 3, 1), (5, 4, 1)]),
+            board_with([(5, 3, 2)]),
+            board_with([(5, 0, 1), (5, 1, 1), (5, 2, 1), (5, 3, 1), (4, 0, 2), (4, 1, 2), (4, 2, 2)]),
+        ]
+        for board in boards:
+            with self.assertRaises(ValueError):
+                parse_request({"board": board, "player": 2})
+
+    def test_rejects_bad_settings(self):
+        board = board_with([(5, 3, 1)])
+        for settings in ({"player": 1}, {"player": True}, {"player": 2, "depth": True}, {"player": 2, "depth": 0},
+                         {"player": 2, "time_limit": True}, {"player": 2, "time_limit": -1},
+                         {"player": 2, "time_limit": server.MAX_TIME + 1}):
+            with self.assertRaises(ValueError):
+                parse_request(dict(settings, board=board))
+
+
+class SearchTest(unittest.TestCase):
+    def test_players_are_kept_by_size_and_side(self):
+        server.worker_players.clear()
+        board = board_with([(5, 3, 1)])
+        for index in range(10):
+            search(board, 2, 1 + index % 2, 0.01 * (index + 1))
+        self.assertEqual(list(server.worker_players), [(6, 7, 2)])
+        for num_cols in range(4, 6 + server.WORKER_PLAYERS):
+            search(board_with([], 4, num_cols), 1, 1, None)
+        self.assertEqual(len(server.worker_players), server.WORKER_PLAYERS)
+
+    def test_searches_stop_at_the_time_cap(self):
+        # the 8x9 board has no opening book, so the search cannot be skipped
+        max_time = server.MAX_TIME
+        server.MAX_TIME = 0.5
+        try:
+            start = time.perf_counter()
+            result = search(board_with([], 8, 9), 1, server.MAX_DEPTH, None)
+        finally:
+            server.MAX_TIME = max_time
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertIn(result["move"], range(9))
+        self.assertLess(result["depth"], server.MAX_DEPTH)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import random, unittest
+from bitboard import Bitboard
+from solver import Solver
+
+
+def exhaustive_score(position):
+    """
+    Scores a position for the player to move by searching every line to the end, in the
+    convention of Solver: a player who wins with their last piece but n scores n.
+    """
+    cells = position.num_rows * position.num_cols
+    if position.last_move_won():
+        return -((cells + 2 - position.ply) // 2)
+    if position.is_full():
+        return 0
+    best = -cells
+    for col in position.legal_moves():
+        position.play(col)
+        best = max(best, -exhaustive_score(position))
+        position.undo()
+    return best
+
+
+def late_position(rng, num_rows, num_cols, empty):
+    """
+    Plays random moves that do not end the game until a given number of cells are left
+    empty, or only such moves are left.
+    """
+    position = Bitboard(num_rows, num_cols)
+    while num_rows * num_cols - position.ply > empty:
+        moves = position.legal_moves()
+        rng.shuffle(moves)
+        for col in moves:
+            position.play(col)
+            if not position.last_move_won():
+                break
+            position.undo()
+        else:
+            break
+    return position
+
+
+class SolverTest(unittest.TestCase):
+    def test_matches_exhaustive_search(self):
+        rng = random.Random(12)
+        solver = Solver(1)
+        for _ in range(60):
+            num_rows, num_cols = rng.choice(((4, 4), (4, 5), (5, 4), (5, 5), (6, 7)))
+            position = late_position(rng, num_rows, num_cols, rng.randint(1, 9))
+            self.assertEqual(solver.solve(position), exhaustive_score(position))
+
+    def test_best_move_keeps_the_score(self):
+        rng = random.Random(13)
+        solver = Solver(1)
+        for _ in range(30):
+            position = late_position(rng, 5, 5, rng.randint(2, 9))
+            col, score = solver.best_move(position)
+            self.assertEqual(score, exhaustive_score(position))
+            position.play(col)
+            self.assertEqual(-exhaustive_score(position), score)
+            position.undo()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,17 @@
+import math, os, tempfile, unittest
+from tuner import START_WEIGHTS, TUNED, Tuner
+
+
+class TunerTest(unittest.TestCase):
+    def test_default_run_moves_the_weights(self):
+        # the perturbations of a run from the default start must change moves, and so the weights
+        with tempfile.TemporaryDirectory() as directory:
+            tuner = Tuner(os.path.join(directory, "checkpoint.json"), depth=2, games=16)
+            scores = [tuner.step(None) for _ in range(3)]
+        self.assertTrue(any(score != 0.5 for score in scores))
+        self.assertNotEqual(tuner.theta, {name: math.log(START_WEIGHTS[name]) for name in TUNED})
+        self.assertLessEqual(tuner.theta["double_threat"], tuner.theta["three_in_a_row"])
+
+
+if __name__ == "__main__":
+    unittest.main()
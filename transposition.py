@@ -0,0 +1,130 @@
+from array import array
+
+# bound types of a stored score
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable:
+    # bytes per slot: key (8), score (8), depth (2), move (2), bound (1), mirrored (1)
+    SLOT_BYTES = 22
+
+    def __init__(self, size_mb=16):
+        """
+        Creates a fixed-size table of searched positions keyed by Zobrist hash.
+
+        The table is made of buckets of two slots stored in flat typed arrays, so its
+        memory use is set once here and never grows. The first slot of a bucket keeps
+        the deepest search seen for that bucket, the second always takes the newest.
+
+        Args:
+        - size_mb (float): The memory budget of the table in megabytes. Default is 16.
+        """
+        self.size_mb = size_mb
+        self.num_buckets = max(1, int(size_mb * 1024 * 1024) // (2 * self.SLOT_BYTES))
+        num_slots = 2 * self.num_buckets
+        self.keys = array("Q", bytes(8 * num_slots))
+        self.scores = array("q", bytes(8 * num_slots))
+        self.depths = array("h", [-1]) * num_slots
+        self.moves = array("h", [-1]) * num_slots
+        self.bounds = array("b", bytes(num_slots))
+        # whether each entry was stored by the reflection of the position its key stands for
+        self.mirrored = array("b", bytes(num_slots))
+        self.probes = 0
+        self.hits = 0
+        self.mirror_hits = 0
+        self.stores = 0
+
+    def clear(self):
+        """
+        Empties the table and resets its statistics without reallocating it.
+
+        Returns:
+        - None
+        """
+        num_slots = 2 * self.num_buckets
+        self.keys[:] = array("Q", bytes(8 * num_slots))
+        self.depths[:] = array("h", [-1]) * num_slots
+        self.moves[:] = array("h", [-1]) * num_slots
+        self.probes = 0
+        self.hits = 0
+        self.mirror_hits = 0
+        self.stores = 0
+
+    def probe(self, key, mirrored=False):
+        """
+        Looks up a position.
+
+        Args:
+        - key (int): The Zobrist hash of the position, or its canonical key from Bitboard.canonical.
+        - mirrored (bool): Whether the key is the hash of the reflection of the position. A hit on an entry
+          stored the other way round counts as a mirror hit: work saved by looking positions up by their canonical key.
+
+        Returns:
+        - int: The slot holding the position, to be read from the scores, depths, moves and bounds arrays, or -1 if it is not stored.
+        """
+        self.probes += 1
+        slot = 2 * (key % self.num_buckets)
+        if not (self.keys[slot] == key and self.depths[slot] >= 0):
+            slot += 1
+            if not (self.keys[slot] == key and self.depths[slot] >= 0):
+                return -1
+        self.hits += 1
+        if self.mirrored[slot] != mirrored:
+            self.mirror_hits += 1
+        return slot
+
+    def store(self, key, depth, bound, score, move, mirrored=False):
+        """
+        Stores the result of a search. It goes into the depth-preferred slot of the bucket
+        if that slot holds the same position or a search that is not deeper, and into
+        the always-replace slot otherwise.
+
+        Args:
+        - key (int): The Zobrist hash of the position.
+        - depth (int): The remaining depth the position was searched to.
+        - bound (int): EXACT, LOWER or UPPER, depending on how the score relates to the true value.
+        - score (int): The score found by the search.
+        - move (int): The best column found by the search, or -1 if there is none.
+        - mirrored (bool): Whether the key is the hash of the reflection of the position. Default is False.
+
+        Returns:
+        - None
+        """
+        self.stores += 1
+        slot = 2 * (key % self.num_buckets)
+        if self.keys[slot] != key and depth < self.depths[slot]:
+            slot += 1
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.bounds[slot] = bound
+        self.scores[slot] = score
+        self.moves[slot] = move
+        self.mirrored[slot] = mirrored
+
+    def entries(self):
+        """
+        Iterates over the stored positions.
+
+        Returns:
+        - generator: The key, depth, bound, score, move and mirrored flag of each stored position.
+        """
+        keys, depths, bounds, scores, moves, mirrored = self.keys, self.depths, self.bounds, self.scores, self.moves, self.mirrored
+        for slot in range(2 * self.num_buckets):
+            if depths[slot] >= 0:
+                yield keys[slot], depths[slot], bounds[slot], scores[slot], moves[slot], mirrored[slot]
+
+    @property
+    def hit_rate(self):
+        """
+        Returns the fraction of probes that found their position.
+        """
+        return self.hits / self.probes if self.probes else 0.0
+
+    @property
+    def mirror_hit_rate(self):
+        """
+        Returns the fraction of probes that found their position only because it was stored by its reflection.
+        """
+        return self.mirror_hits / self.probes if self.probes else 0.0
@@ -0,0 +1,275 @@
+"""
+Tunes the weights of the evaluation heuristics by self-play with SPSA (simultaneous
+perturbation stochastic approximation). Each iteration nudges every tuned weight up or
+down at random, plays two engines with the weights moved in opposite directions against
+each other from the same random openings, and moves the weights towards the side that
+scored better. The weights are tuned on a log scale, since they span ten orders of magnitude.
+
+    python tuner.py --iterations 200 --games 64 --depth 3 --workers 8 --output weights.json
+
+The weights file is written after every iteration, and can be loaded with
+evaluation.load_weights and given to MiniMaxComputer, or to arena.py --weights1. The run is
+checkpointed too, and starting it again with the same checkpoint resumes it.
+"""
+import argparse, json, math, os, random, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from arena import HeadlessGame
+from bitboard import Bitboard
+from checkers import check_win, check_tie
+from evaluation import DEFAULT_WEIGHTS, Evaluator, load_weights
+from players import MiniMaxComputer
+
+# the heuristics that are tuned; a four in a row must outweigh everything else, the "threat"
+# and "block" heuristics never apply, and the central column bonus adds the same amount to
+# every position, so they are left as they are
+TUNED = ["three_in_a_row", "two_in_a_row", "open_three", "open_two", "double_threat"]
+
+# the weights a new run starts from. The default double_threat weight outweighs the other terms
+# by six orders of magnitude, so that nudging any weight changes no move; runs start with it in
+# the range of the others instead. The other tuned weights are the defaults scaled up a hundredfold,
+# which changes no move, so that rounding to integers does not undo the nudges of the smallest
+START_WEIGHTS = dict(DEFAULT_WEIGHTS, three_in_a_row=10000, two_in_a_row=1000, open_three=10000, open_two=100, double_threat=2000)
+
+# the number of evaluations a worker process keeps for each set of weights
+EVALUATION_CACHE_SIZE = 200000
+
+
+class CachedEvaluator(Evaluator):
+    """
+    An evaluator that remembers the scores of the positions it has evaluated. The games of
+    an iteration start from the same openings and often reach the same positions.
+    """
+
+    def __init__(self, num_rows, num_cols, weights=None):
+        super().__init__(num_rows, num_cols, weights)
+        self.cache = {}
+
+    def evaluate(self, position, player):
+        key = (position.hash, player)
+        score = self.cache.get(key)
+        if score is None:
+            if len(self.cache) >= EVALUATION_CACHE_SIZE:
+                self.cache.clear()
+            score = self.cache[key] = Evaluator.evaluate(self, position, player)
+        return score
+
+
+def weights_of(theta):
+    """
+    Turns the log-scale parameters of the tuned heuristics into a full set of integer weights.
+
+    Args:
+    - theta (dict): The natural logarithm of the weight of each tuned heuristic.
+
+    Returns:
+    - dict: The weight of each heuristic, with the keys of DEFAULT_WEIGHTS.
+    """
+    return dict(DEFAULT_WEIGHTS, **{name: max(1, round(math.exp(value))) for name, value in theta.items()})
+
+
+def make_opening(num_rows, num_cols, plies, seed):
+    """
+    Plays random moves from the empty board, avoiding moves that end the game.
+
+    Returns:
+    - list: The columns played.
+    """
+    rng = random.Random(seed)
+    position = Bitboard(num_rows, num_cols)
+    moves = []
+    while len(moves) < plies:
+        col = rng.choice(position.legal_moves())
+        position.play(col)
+        if position.last_move_won():
+            position.undo()
+            continue
+        moves.append(col)
+    return moves
+
+
+# the evaluators of a worker process by board size and weights, keeping their caches between games
+worker_evaluators = {}
+
+
+def play_match(spec):
+    """
+    Plays one game between two sets of weights in a worker process.
+
+    Args:
+    - spec (dict): The game settings: num_rows, num_cols, depth, opening (the columns played before
+      the engines take over), first and second, the weights of the players who move first and second
+      after the opening.
+
+    Returns:
+    - float: The score of the first player: 1 for a win, 1/2 for a tie and 0 for a loss.
+    """
+    game = HeadlessGame(spec["num_rows"], spec["num_cols"])
+    for ply, col in enumerate(spec["opening"]):
+        game.drop(col, 1 + ply % 2)
+    first_name = 1 + len(spec["opening"]) % 2
+    players = []
+    for name, weights in ((first_name, spec["first"]), (3 - first_name, spec["second"])):
+        key = (spec["num_rows"], spec["num_cols"], tuple(sorted(weights.items())))
+        if key not in worker_evaluators:
+            if len(worker_evaluators) >= 4:
+                worker_evaluators.clear()
+            worker_evaluators[key] = CachedEvaluator(spec["num_rows"], spec["num_cols"], weights)
+        # no book or solver, so that only the evaluation decides the moves
+        player = MiniMaxComputer(name, None, spec["depth"], tt_size_mb=4, solver_threshold=0, weights=weights)
+        player.evaluator = worker_evaluators[key]
+        players.append(player)
+    current = 0
+    while True:
+        player = players[current]
+        col = player.play(game)
+        row = game.drop(col, player.name)
+        if row is None or check_win(game.board, row, col, game.num_rows, game.num_cols):
+            # a move that cannot be played loses the game
+            return 1.0 if (row is not None) == (current == 0) else 0.0
+        if check_tie(game.board, game.num_cols):
+            return 0.5
+        current = 1 - current
+
+
+class Tuner:
+    def __init__(self, checkpoint, num_rows=6, num_cols=7, depth=3, games=64, opening_plies=4, a=0.5, c=0.3, stability=10, seed=0, workers=1, start=None):
+        """
+        Sets up a tuning run, resuming it from its checkpoint file if there is one.
+
+        Args:
+        - checkpoint (str): The path of the checkpoint file, written after every iteration.
+        - num_rows (int): The number of rows in the game board. Default is 6.
+        - num_cols (int): The number of columns in the game board. Default is 7.
+        - depth (int): The search depth of the engines. Default is 3.
+        - games (int): The number of games of each iteration, played in pairs from the same opening with colors swapped. Default is 64.
+        - opening_plies (int): The number of random moves played before the engines take over. Default is 4.
+        - a (float): The step size of the first iteration, in log-weight per unit of score difference. Default is 0.5.
+        - c (float): The perturbation of the first iteration, in log-weight. Default is 0.3.
+        - stability (int): The number of iterations added to the step size schedule to make the first steps smaller. Default is 10.
+        - seed (int): The seed of the perturbations and openings; iteration k uses seed + k. Default is 0.
+        - workers (int): The number of processes to play games in. Default is 1.
+        - start (dict): The weights to start a new run from. Default is START_WEIGHTS.
+        """
+        self.checkpoint = checkpoint
+        self.settings = {"num_rows": num_rows, "num_cols": num_cols, "depth": depth, "games": games, "opening_plies": opening_plies,
+                         "a": a, "c": c, "stability": stability, "seed": seed}
+        self.workers = workers
+        self.iteration = 0
+        self.theta = {name: math.log((start or START_WEIGHTS)[name]) for name in TUNED}
+        # the score of the plus side of every iteration, to follow the progress of the run
+        self.history = []
+        if os.path.exists(checkpoint):
+            with open(checkpoint) as file:
+                state = json.load(file)
+            # the schedule and the openings depend on the settings, so a run is resumed with those it started with
+            self.settings = state["settings"]
+            self.iteration = state["iteration"]
+            self.theta = state["theta"]
+            self.history = state["history"]
+
+    def step(self, pool):
+        """
+        Runs one SPSA iteration.
+
+        Args:
+        - pool (ProcessPoolExecutor): The processes to play in, or None to play in this process.
+
+        Returns:
+        - float: The share of the points won by the weights moved in the plus direction.
+        """
+        settings = self.settings
+        k = self.iteration
+        rng = random.Random(settings["seed"] + k)
+        a_k = settings["a"] / (k + 1 + settings["stability"]) ** 0.602
+        c_k = settings["c"] / (k + 1) ** 0.101
+        delta = {name: rng.choice((-1, 1)) for name in TUNED}
+        plus = weights_of({name: value + c_k * delta[name] for name, value in self.theta.items()})
+        minus = weights_of({name: value - c_k * delta[name] for name, value in self.theta.items()})
+        specs = []
+        for _ in range(settings["games"] // 2):
+            opening = make_opening(settings["num_rows"], settings["num_cols"], settings["opening_plies"], rng.getrandbits(32))
+            base = {"num_rows": settings["num_rows"], "num_cols": settings["num_cols"], "depth": settings["depth"], "opening": opening}
+            specs.append(dict(base, first=plus, second=minus))
+            specs.append(dict(base, first=minus, second=plus))
+        if pool is None:
+            results = [play_match(spec) for spec in specs]
+        else:
+            results = list(pool.map(play_match, specs, chunksize=max(1, len(specs) // (4 * self.workers))))
+        # the points of the plus side: the first player in even games, the second in odd ones
+        score = sum(result if index % 2 == 0 else 1 - result for index, result in enumerate(results)) / len(results)
+        gradient = 2 * score - 1
+        for name in TUNED:
+            self.theta[name] += a_k * gradient / (2 * c_k * delta[name])
+        # a window holding one piece is kept from outweighing one holding three, where it would
+        # again decide every move on its own
+        self.theta["double_threat"] = min(self.theta["double_threat"], self.theta["three_in_a_row"])
+        self.iteration += 1
+        self.history.append(score)
+        return score
+
+    def save(self, output):
+        """
+        Writes the checkpoint, and the current weights to the weights file.
+
+        Args:
+        - output (str): The path of the weights file.
+
+        Returns:
+        - None
+        """
+        state = {"settings": self.settings, "iteration": self.iteration, "theta": self.theta, "history": self.history}
+        # write next to the destination and rename, so that an interrupted run leaves the last complete files
+        for path, data in ((self.checkpoint, state), (output, weights_of(self.theta))):
+            with open(path + ".tmp", "w") as file:
+                json.dump(data, file, indent=2)
+            os.replace(path + ".tmp", path)
+
+    def run(self, iterations, output):
+        """
+        Runs iterations until the run has made the given number, saving after each one.
+
+        Args:
+        - iterations (int): The total number of iterations of the run, counting those before a resume.
+        - output (str): The path of the weights file.
+
+        Returns:
+        - dict: The tuned weights.
+        """
+        pool = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        try:
+            while self.iteration < iterations:
+                start = time.perf_counter()
+                score = self.step(pool)
+                self.save(output)
+                weights = weights_of(self.theta)
+                print(f"iteration {self.iteration}: plus side scored {score:.3f} in {time.perf_counter() - start:.1f}s, "
+                      + ", ".join(f"{name} {weights[name]}" for name in TUNED), file=sys.stderr)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return weights_of(self.theta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tunes the evaluation weights of MiniMaxComputer by self-play with SPSA.")
+    parser.add_argument("--iterations", type=int, default=200, help="total iterations of the run, counting those before a resume")
+    parser.add_argument("--games", type=int, default=64, help="games per iteration, in pairs with colors swapped")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--cols", type=int, default=7)
+    parser.add_argument("--opening-plies", type=int, default=4, help="random moves played before the engines take over")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--start", help="weights file to start a new run from; default is START_WEIGHTS of tuner.py")
+    parser.add_argument("--checkpoint", default="tuner_checkpoint.json", help="checkpoint file; an existing one is resumed")
+    parser.add_argument("--output", default="weights.json", help="weights file to write")
+    args = parser.parse_args()
+
+    start = load_weights(args.start) if args.start else None
+    tuner = Tuner(args.checkpoint, args.rows, args.cols, args.depth, args.games, args.opening_plies, seed=args.seed, workers=args.workers, start=start)
+    tuner.run(args.iterations, args.output)
+    print(f"weights written to {args.output}; check them with arena.py --weights1 {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()